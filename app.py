@@ -1,11 +1,49 @@
-from flask import Flask,jsonify,request
+import time
+
+from flask import Flask,Response,jsonify,request,stream_with_context
 from flask_cors import CORS
 from config import Config
-from db import get_db
-from recommender import recommend_courses
+from llm import get_openai_client
+from recommender import get_catalog_filters, recommend_courses, recommend_courses_batch, start_reload_watcher, warm_up as warm_up_recommender
+from routes.admin_routes import admin_bp
 from routes.user_routes import user_bp
-from services.recommendation_service import get_all_questions, get_recommendation, get_recommendation_based_on_skill, get_required_step_by_user_goal, get_topics_based_on_user, goal_step_map
-from services.user_service import create_user_goal, get_goal_steps, get_user_goals, run_generate_mcq
+from services.goal_job_service import get_goal_job_status, submit_goal_job
+from services.recommendation_service import get_all_questions, get_all_questions_fanout, stream_all_questions, get_recommendation, get_recommendation_based_on_skill, get_required_step_by_user_goal, get_topics_based_on_user, goal_step_map, recommendation_mode
+from services.user_service import bank_mcq_set, create_user_goal, get_goal_steps, get_user_goals, run_generate_mcq, stream_generate_mcq
+from sse import sse, wants_stream
+
+def _event_stream(items):
+    """
+    Server-sent events response: one "question" event per item from
+    `items`, then "done" with the count, or "error" if generation fails.
+    """
+    def generate():
+        count = 0
+        try:
+            for item in items:
+                count += 1
+                yield sse("question", item)
+            yield sse("done", {"count": count})
+        except Exception as e:
+            print("Streaming generation failed:", e)
+            yield sse("error", {"error": str(e), "count": count})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def warm_up():
+    """
+    Do the work a first request would otherwise wait for: load the catalog
+    and index (importing faiss and pandas) and create the OpenAI client.
+    """
+    started = time.perf_counter()
+    warm_up_recommender()
+    if Config.OPENAI_API_KEY:
+        get_openai_client()
+    print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
 
 def create_app():
     app = Flask(__name__)
@@ -13,10 +51,21 @@ def create_app():
     app.config.from_object(Config)
 
     app.register_blueprint(user_bp, url_prefix='/users')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+
+    if Config.WARM_UP_ON_START:
+        warm_up()
+    # Picks up artifact versions published by generate_embeddings.py
+    start_reload_watcher()
     
     @app.route('/user-recommendation/<int:user_id>', methods=["GET"])
     def get_user_recommendation(user_id):
-        result = get_recommendation(user_id)
+        # ?mode=llm|catalog|hybrid, defaulting to USER_RECOMMENDATION_MODE
+        try:
+            mode = recommendation_mode(request.args.get("mode"))
+        except ValueError as e:
+            return jsonify({"status": "failure", "message": str(e)}), 400
+        result = get_recommendation(user_id, mode)
         if result is None:
             return jsonify({"status": "failure", "message": "No recommendation found"}), 404
         
@@ -31,6 +80,17 @@ def create_app():
     def generate_questions():
         data = request.json
         print(data["topics"])
+        if wants_stream(request):
+            return _event_stream(
+                {"topic": topic, "question": question}
+                for topic, question in stream_all_questions(data["topics"])
+            )
+        fanout = data.get("fanout")
+        if fanout is None:
+            fanout = Config.QUESTION_FANOUT_MIN_TOPICS and len(data["topics"]) >= Config.QUESTION_FANOUT_MIN_TOPICS
+        if fanout and Config.OPENAI_API_KEY:
+            result, failed = get_all_questions_fanout(data["topics"])
+            return jsonify({"status": "success", "data": result, "failed_topics": failed}), 200
         result = get_all_questions(data["topics"])
         return jsonify({"status": "success", "data": result}), 200
 
@@ -41,13 +101,63 @@ def create_app():
     
     @app.route("/recommend", methods=["GET"])
     def recommend():
-        print('recommend')
         query = request.args.get("query")
         
         if not query:
             return jsonify({"error": "Missing ?query= parameter"}), 400
         
-        results = recommend_courses(query)
+        top_k = request.args.get("top_k", 5, type=int)
+        min_score = request.args.get("min_score", type=float)
+        # ?difficulty=Beginner&difficulty=Intermediate&university=...&min_rating=4.5
+        filters = {
+            "difficulty": request.args.getlist("difficulty"),
+            "university": request.args.getlist("university"),
+            "min_rating": request.args.get("min_rating", type=float),
+        }
+        results = recommend_courses(query, top_k, min_score, filters)
+        return jsonify({"results": results})
+
+    @app.route("/recommend/filters", methods=["GET"])
+    def recommend_filters():
+        # Values accepted by the /recommend filters
+        catalog_filters = get_catalog_filters()
+        return jsonify({
+            "difficulty": catalog_filters.values("difficulty"),
+            "university": catalog_filters.values("university"),
+            "min_rating": catalog_filters.rating_thresholds,
+        })
+
+    @app.route("/recommend/batch", methods=["POST"])
+    def recommend_batch():
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "request body must be a JSON object"}), 400
+        queries = data.get("queries")
+
+        if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+            return jsonify({"error": "\"queries\" must be a non-empty list of strings"}), 400
+        if len(queries) > Config.RECOMMEND_BATCH_MAX:
+            return jsonify({"error": f"At most {Config.RECOMMEND_BATCH_MAX} queries per request"}), 400
+        filters = data.get("filters") or {}
+        if not isinstance(filters, dict):
+            return jsonify({"error": "\"filters\" must be an object"}), 400
+        try:
+            top_k = int(data.get("top_k", 5))
+        except (TypeError, ValueError):
+            top_k = 0
+        if top_k < 1:
+            return jsonify({"error": "\"top_k\" must be a positive integer"}), 400
+        min_score = data.get("min_score")
+        try:
+            min_score = None if min_score is None else float(min_score)
+        except (TypeError, ValueError):
+            return jsonify({"error": "\"min_score\" must be a number"}), 400
+        try:
+            get_catalog_filters().bitmap(filters)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        results = recommend_courses_batch(queries, top_k, min_score, filters)
         return jsonify({"results": results})
     
 
@@ -65,9 +175,24 @@ def create_app():
         print(data["goal"])
         
         goal_id = create_user_goal(data)
+
+        # Background mode: return right away and let a worker generate the
+        # steps; poll /user-goals-status/<goal_id> for the outcome
+        run_async = data.get("async", request.args.get("async", str(Config.GOAL_JOBS_ASYNC)))
+        if str(run_async).lower() in ("1", "true", "yes"):
+            submit_goal_job(goal_id, data["goal"])
+            return jsonify({"status": "success", "data": {"goal_id": goal_id, "goal": data["goal"], "job_status": "pending"}}), 202
+
         result = get_required_step_by_user_goal(data["goal"])
         goal_step_map(goal_id, result)
         return jsonify({"status": "success", "data": {"goal_id": goal_id, "goal": data["goal"]}}), 200
+
+    @app.route('/user-goals-status/<int:goal_id>', methods=["GET"])
+    def goal_status(goal_id):
+        job = get_goal_job_status(goal_id)
+        if job is None:
+            return jsonify({"status": "failure", "message": "No background job for this goal"}), 404
+        return jsonify({"status": "success", "data": job}), 200
     
     @app.route('/user-goals/<int:user_id>', methods=["GET"])
     def get_goals(user_id):
@@ -84,6 +209,14 @@ def create_app():
     def generate_mcq():
         data = request.json
         print(data["topic"])
+        # Pre-generated questions from mcq_bank when MCQ_SOURCE allows it
+        bank = bank_mcq_set(data["topic"])
+        if bank is None and Config.MCQ_SOURCE == "bank":
+            return jsonify({"status": "failure", "message": "No question bank for this skill"}), 404
+        if wants_stream(request):
+            return _event_stream(bank if bank is not None else stream_generate_mcq(data["topic"]))
+        if bank is not None:
+            return jsonify({"status": "success", "data": bank, "source": "bank"}), 200
         result = run_generate_mcq(data["topic"])
         return jsonify({"status": "success", "data": result}), 200  
     
@@ -0,0 +1,133 @@
+# artifacts.py
+#
+# Versioned artifact directories. With ARTIFACTS_DIR set, every build from
+# generate_embeddings.py goes into a new directory
+#
+#   artifacts/
+#     20261017-140501-123456/   index.faiss, catalog.bin, index_keys.json,
+#                               embeddings.npy, manifest.json
+#     CURRENT                   name of the version being served
+#
+# and is published by replacing CURRENT in one os.replace, so a reader sees
+# either the old version or the new one, never a mix. Servers pick the new
+# version up with recommender.reload() (POST /admin/reload or the watcher).
+# Old versions are pruned after publishing; a process that still has one
+# memory-mapped keeps its pages until it lets go.
+import json
+import os
+import shutil
+import time
+
+from config import Config
+from sharded_index import shard_manifest_path
+
+MANIFEST = "manifest.json"
+CURRENT = "CURRENT"
+ARTIFACT_FILES = {
+    "index": "index.faiss",
+    "catalog": "catalog.bin",
+    "keys": "index_keys.json",
+    "embeddings": "embeddings.npy",
+}
+
+
+def enabled():
+    return bool(Config.ARTIFACTS_DIR)
+
+
+def current_version(root=None):
+    # None when nothing has been published yet
+    try:
+        with open(os.path.join(root or Config.ARTIFACTS_DIR, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def artifact_paths(version=None, root=None):
+    """
+    File paths of one version ({"index": ..., "catalog": ..., ...}). Without
+    ARTIFACTS_DIR these are the flat INDEX_PATH, CATALOG_PATH, ... settings.
+    """
+    if not enabled() and root is None:
+        return {
+            "index": Config.INDEX_PATH,
+            "catalog": Config.CATALOG_PATH,
+            "keys": Config.INDEX_KEYS_PATH,
+            "embeddings": Config.EMBEDDINGS_PATH,
+        }
+    root = root or Config.ARTIFACTS_DIR
+    version = version or current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No artifact version published in {root}; run generate_embeddings.py")
+    return {name: os.path.join(root, version, filename) for name, filename in ARTIFACT_FILES.items()}
+
+
+def new_version(root=None):
+    """Create an empty directory for the next build. Returns (version, path)."""
+    root = root or Config.ARTIFACTS_DIR
+    now = time.time()
+    version = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now % 1 * 1e6):06d}"
+    path = os.path.join(root, version)
+    os.makedirs(path)
+    return version, path
+
+
+def read_manifest(version=None, root=None):
+    root = root or Config.ARTIFACTS_DIR
+    version = version or current_version(root)
+    with open(os.path.join(root, version, MANIFEST)) as f:
+        return json.load(f)
+
+
+def publish(version, manifest, root=None, keep=None):
+    """
+    Write the version's manifest, point CURRENT at it and prune old
+    versions beyond `keep` (default ARTIFACTS_KEEP).
+    """
+    root = root or Config.ARTIFACTS_DIR
+    path = os.path.join(root, version)
+    paths = artifact_paths(version, root)
+    missing = [os.path.basename(paths[name]) for name in ("catalog", "keys") if not os.path.exists(paths[name])]
+    if not os.path.exists(paths["index"]) and not os.path.exists(shard_manifest_path(paths["index"])):
+        missing.append(ARTIFACT_FILES["index"])
+    if missing:
+        raise FileNotFoundError(f"Cannot publish {version}: missing {', '.join(missing)}")
+
+    manifest = dict(manifest, version=version, published_at=time.time(), files={
+        name: os.path.getsize(os.path.join(path, f))
+        for name, f in ARTIFACT_FILES.items() if os.path.exists(os.path.join(path, f))
+    })
+    with open(os.path.join(path, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    tmp = os.path.join(root, f"{CURRENT}.tmp")
+    with open(tmp, "w") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, CURRENT))
+    prune(root, keep)
+    return manifest
+
+
+def list_versions(root=None):
+    # Published or not, oldest first (names sort by build time)
+    root = root or Config.ARTIFACTS_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+
+
+def prune(root=None, keep=None):
+    # Only versions older than CURRENT go, so a build still being written is safe
+    root = root or Config.ARTIFACTS_DIR
+    keep = Config.ARTIFACTS_KEEP if keep is None else keep
+    current = current_version(root)
+    if current is None:
+        return []
+    versions = [v for v in list_versions(root) if v < current]
+    removed = versions[:max(0, len(versions) - max(keep - 1, 0))]
+    for version in removed:
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+    return removed
@@ -0,0 +1,225 @@
+import asyncio
+
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+from async_db import close_pool
+from config import Config
+from llm import get_async_openai_client
+from recommender import get_catalog_filters, recommend_courses, recommend_courses_batch, start_reload_watcher, warm_up
+from routes.async_admin_routes import async_admin_bp
+from routes.async_user_routes import async_user_bp
+from services.async_recommendation_service import get_all_questions, get_all_questions_fanout, stream_all_questions, get_recommendation, get_recommendation_based_on_skill, get_required_step_by_user_goal, get_topics_based_on_user, goal_step_map, get_goal_job_status, submit_goal_job
+from services.recommendation_service import recommendation_mode
+from services.async_user_service import bank_mcq_set, create_user_goal, get_goal_steps, get_user_goals, run_generate_mcq, stream_generate_mcq
+from sse import sse, wants_stream
+
+# ASGI counterpart of app.py: the same routes and responses, served by
+# coroutines so a single process can hold many requests that are waiting on
+# Postgres or the model. Run it with an ASGI server, e.g.
+#
+#     hypercorn "asgi_app:create_asgi_app()" --bind 0.0.0.0:8000
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+def _event_stream(items):
+    """Server-sent events from an async iterator, in the format app.py uses."""
+    async def generate():
+        count = 0
+        try:
+            async for item in items:
+                count += 1
+                yield sse("question", item)
+            yield sse("done", {"count": count})
+        except Exception as e:
+            print("Streaming generation failed:", e)
+            yield sse("error", {"error": str(e), "count": count})
+
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.timeout = None
+    return response
+
+def create_asgi_app():
+    app = cors(Quart(__name__))
+    app.config.from_object(Config)
+
+    app.register_blueprint(async_user_bp, url_prefix='/users')
+    app.register_blueprint(async_admin_bp, url_prefix='/admin')
+
+    @app.before_serving
+    async def startup():
+        if Config.WARM_UP_ON_START:
+            await asyncio.to_thread(warm_up)
+            if Config.OPENAI_API_KEY:
+                get_async_openai_client()
+        start_reload_watcher()
+
+    @app.after_serving
+    async def shutdown():
+        await close_pool()
+
+    @app.route('/user-recommendation/<int:user_id>', methods=["GET"])
+    async def get_user_recommendation(user_id):
+        try:
+            mode = recommendation_mode(request.args.get("mode"))
+        except ValueError as e:
+            return jsonify({"status": "failure", "message": str(e)}), 400
+        result = await get_recommendation(user_id, mode)
+        if result is None:
+            return jsonify({"status": "failure", "message": "No recommendation found"}), 404
+        return jsonify({"status": "success", "data": result}), 200
+
+    @app.route('/user-topic-recommendation/<int:user_id>', methods=["GET"])
+    async def get_topics_for_user(user_id):
+        result = await get_topics_based_on_user(user_id)
+        return jsonify({"status": "success", "data": result}), 200
+
+    @app.route('/generate-questions', methods=["POST"])
+    async def generate_questions():
+        data = await request.get_json()
+        if wants_stream(request):
+            async def questions():
+                async for topic, question in stream_all_questions(data["topics"]):
+                    yield {"topic": topic, "question": question}
+            return _event_stream(questions())
+        fanout = data.get("fanout")
+        if fanout is None:
+            fanout = Config.QUESTION_FANOUT_MIN_TOPICS and len(data["topics"]) >= Config.QUESTION_FANOUT_MIN_TOPICS
+        if fanout and Config.OPENAI_API_KEY:
+            result, failed = await get_all_questions_fanout(data["topics"])
+            return jsonify({"status": "success", "data": result, "failed_topics": failed}), 200
+        result = await get_all_questions(data["topics"])
+        return jsonify({"status": "success", "data": result}), 200
+
+    @app.route('/')
+    async def home():
+        return jsonify({"message": "Welcome to the Course Recommendation API"}), 200
+
+    @app.route("/recommend", methods=["GET"])
+    async def recommend():
+        query = request.args.get("query")
+
+        if not query:
+            return jsonify({"error": "Missing ?query= parameter"}), 400
+
+        top_k = request.args.get("top_k", 5, type=int)
+        min_score = request.args.get("min_score", type=float)
+        # ?difficulty=Beginner&difficulty=Intermediate&university=...&min_rating=4.5
+        filters = {
+            "difficulty": request.args.getlist("difficulty"),
+            "university": request.args.getlist("university"),
+            "min_rating": request.args.get("min_rating", type=float),
+        }
+        # Embedding and the FAISS search block, so keep them off the event loop
+        results = await asyncio.to_thread(recommend_courses, query, top_k, min_score, filters)
+        return jsonify({"results": results})
+
+    @app.route("/recommend/filters", methods=["GET"])
+    async def recommend_filters():
+        # Values accepted by the /recommend filters
+        catalog_filters = get_catalog_filters()
+        return jsonify({
+            "difficulty": catalog_filters.values("difficulty"),
+            "university": catalog_filters.values("university"),
+            "min_rating": catalog_filters.rating_thresholds,
+        })
+
+    @app.route("/recommend/batch", methods=["POST"])
+    async def recommend_batch():
+        data = await request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "request body must be a JSON object"}), 400
+        queries = data.get("queries")
+
+        if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+            return jsonify({"error": "\"queries\" must be a non-empty list of strings"}), 400
+        if len(queries) > Config.RECOMMEND_BATCH_MAX:
+            return jsonify({"error": f"At most {Config.RECOMMEND_BATCH_MAX} queries per request"}), 400
+        filters = data.get("filters") or {}
+        if not isinstance(filters, dict):
+            return jsonify({"error": "\"filters\" must be an object"}), 400
+        try:
+            top_k = int(data.get("top_k", 5))
+        except (TypeError, ValueError):
+            top_k = 0
+        if top_k < 1:
+            return jsonify({"error": "\"top_k\" must be a positive integer"}), 400
+        min_score = data.get("min_score")
+        try:
+            min_score = None if min_score is None else float(min_score)
+        except (TypeError, ValueError):
+            return jsonify({"error": "\"min_score\" must be a number"}), 400
+        try:
+            get_catalog_filters().bitmap(filters)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        results = await asyncio.to_thread(recommend_courses_batch, queries, top_k, min_score, filters)
+        return jsonify({"results": results})
+
+    @app.route('/generate-steps', methods=["POST"])
+    async def generate_steps():
+        data = await request.get_json()
+        result = await get_required_step_by_user_goal(data["goal"])
+        return jsonify({"status": "success", "data": result}), 200
+
+    @app.route('/user-goals', methods=["POST"])
+    async def create_goal():
+        data = await request.get_json()
+        goal_id = await create_user_goal(data)
+
+        run_async = data.get("async", request.args.get("async", str(Config.GOAL_JOBS_ASYNC)))
+        if str(run_async).lower() in ("1", "true", "yes"):
+            await submit_goal_job(goal_id, data["goal"])
+            return jsonify({"status": "success", "data": {"goal_id": goal_id, "goal": data["goal"], "job_status": "pending"}}), 202
+
+        result = await get_required_step_by_user_goal(data["goal"])
+        await goal_step_map(goal_id, result)
+        return jsonify({"status": "success", "data": {"goal_id": goal_id, "goal": data["goal"]}}), 200
+
+    @app.route('/user-goals-status/<int:goal_id>', methods=["GET"])
+    async def goal_status(goal_id):
+        job = await get_goal_job_status(goal_id)
+        if job is None:
+            return jsonify({"status": "failure", "message": "No background job for this goal"}), 404
+        return jsonify({"status": "success", "data": job}), 200
+
+    @app.route('/user-goals/<int:user_id>', methods=["GET"])
+    async def get_goals(user_id):
+        result = await get_user_goals(user_id)
+        return jsonify({"status": "success", "data": result}), 200
+
+    @app.route('/user-goals-steps/<int:goal_id>', methods=["GET"])
+    async def goals_steps(goal_id):
+        result = await get_goal_steps(goal_id)
+        return jsonify({"status": "success", "data": result}), 200
+
+    @app.route('/generate-mcq', methods=["POST"])
+    async def generate_mcq():
+        data = await request.get_json()
+        bank = await bank_mcq_set(data["topic"])
+        if bank is None and Config.MCQ_SOURCE == "bank":
+            return jsonify({"status": "failure", "message": "No question bank for this skill"}), 404
+        if wants_stream(request):
+            return _event_stream(_aiter(bank) if bank is not None else stream_generate_mcq(data["topic"]))
+        if bank is not None:
+            return jsonify({"status": "success", "data": bank, "source": "bank"}), 200
+        result = await run_generate_mcq(data["topic"])
+        return jsonify({"status": "success", "data": result}), 200
+
+    @app.route('/recommended_course_based_on_skill', methods=["POST"])
+    async def generate_recommended_course():
+        data = await request.get_json()
+        result = await get_recommendation_based_on_skill(data)
+        return jsonify({"status": "success", "data": result}), 200
+
+    return app
+
+
+if __name__ == "__main__":
+    create_asgi_app().run()
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import asyncpg
+from config import Config
+
+# asyncpg counterpart of db.py for the ASGI app. Queries use $1, $2, ...
+# placeholders and rows come back as plain dicts, like RealDictCursor.
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+async def _init_connection(conn):
+    # Hand jsonb columns over as Python objects, as psycopg2 does
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    await conn.set_type_codec("json", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def get_pool():
+    """The process-wide asyncpg pool, created on first use in the running loop."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await asyncpg.create_pool(
+                    host=Config.DB_HOST,
+                    database=Config.DB_NAME,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD,
+                    port=Config.DB_PORT,
+                    min_size=Config.DB_POOL_MIN,
+                    max_size=Config.DB_POOL_MAX,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    init=_init_connection,
+                )
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def fetch(query, *args):
+    pool = await get_pool()
+    async with pool.acquire(timeout=Config.DB_POOL_TIMEOUT) as conn:
+        rows = await conn.fetch(query, *args)
+    return [dict(r) for r in rows]
+
+
+async def fetchrow(query, *args):
+    pool = await get_pool()
+    async with pool.acquire(timeout=Config.DB_POOL_TIMEOUT) as conn:
+        row = await conn.fetchrow(query, *args)
+    return dict(row) if row is not None else None
+
+
+async def fetchval(query, *args):
+    pool = await get_pool()
+    async with pool.acquire(timeout=Config.DB_POOL_TIMEOUT) as conn:
+        return await conn.fetchval(query, *args)
+
+
+async def execute(query, *args):
+    """Runs one statement in its own transaction; returns the status tag, e.g. "DELETE 3"."""
+    pool = await get_pool()
+    async with pool.acquire(timeout=Config.DB_POOL_TIMEOUT) as conn:
+        return await conn.execute(query, *args)
+
+
+def get_pool_stats():
+    if _pool is None:
+        return {"size": 0, "idle": 0, "min": Config.DB_POOL_MIN, "max": Config.DB_POOL_MAX}
+    return {
+        "size": _pool.get_size(),
+        "idle": _pool.get_idle_size(),
+        "min": _pool.get_min_size(),
+        "max": _pool.get_max_size(),
+    }
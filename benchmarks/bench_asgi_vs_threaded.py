@@ -0,0 +1,172 @@
+# Compare the threaded Flask app with the ASGI app on an LLM-bound route.
+# Both servers are started in subprocesses with the model call replaced by a
+# fixed sleep (--llm-latency), so the numbers measure how many waiting
+# requests each server model can hold, not OpenAI's latency.
+#
+#   python -m benchmarks.bench_asgi_vs_threaded --requests 400 --concurrency 200
+#   python -m benchmarks.bench_asgi_vs_threaded --threads 32 --llm-latency 1.0 --out asgi.json
+#
+# --flask-url / --asgi-url point the load generator at servers that are
+# already running (real model calls) instead.
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from benchmarks.common import percentiles, save_json
+
+FAKE_QUESTIONS = json.dumps({"Python": [{"question": "q", "options": {"A": "a", "B": "b", "C": "c", "D": "d"}}]})
+
+
+def serve_flask(port, threads, latency):
+    from werkzeug.serving import BaseWSGIServer
+    from config import Config
+    import services.recommendation_service as svc
+
+    def fake_chat_completion(prompt, **kwargs):
+        time.sleep(latency)
+        return FAKE_QUESTIONS
+
+    Config.OPENAI_API_KEY = "benchmark"
+    svc.chat_completion = fake_chat_completion
+    from app import create_app
+
+    class PooledWSGIServer(BaseWSGIServer):
+        # A fixed worker pool, like gunicorn's gthread worker, rather than
+        # werkzeug's unbounded thread per request
+        pool = ThreadPoolExecutor(max_workers=threads)
+        request_queue_size = 1024
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer("127.0.0.1", port, create_app()).serve_forever()
+
+
+def serve_asgi(port, latency):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config as HypercornConfig
+    from config import Config
+    import services.async_recommendation_service as svc
+
+    async def fake_chat_completion(prompt, **kwargs):
+        await asyncio.sleep(latency)
+        return FAKE_QUESTIONS
+
+    Config.OPENAI_API_KEY = "benchmark"
+    svc.async_chat_completion = fake_chat_completion
+    from asgi_app import create_asgi_app
+
+    config = HypercornConfig()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.backlog = 1024
+    config.accesslog = None
+    asyncio.run(serve(create_asgi_app(), config))
+
+
+async def run_load(base_url, path, body, requests, concurrency, timeout):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    resp = await client.post(path, json=body)
+                    resp.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except Exception:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        **(percentiles(latencies) if latencies else {}),
+    }
+
+
+def wait_until_up(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base_url + "/", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+def start_server(kind, port, args):
+    cmd = [sys.executable, "-m", "benchmarks.bench_asgi_vs_threaded", "--serve", kind,
+           "--port", str(port), "--threads", str(args.threads), "--llm-latency", str(args.llm_latency)]
+    return subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the threaded Flask app against the ASGI app")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200, help="requests in flight at once")
+    parser.add_argument("--threads", type=int, default=16, help="worker threads for the Flask server")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="simulated model latency in seconds")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--flask-url", help="benchmark a running threaded server instead of starting one")
+    parser.add_argument("--asgi-url", help="benchmark a running ASGI server instead of starting one")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--serve", choices=["flask", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve == "flask":
+        return serve_flask(args.port, args.threads, args.llm_latency)
+    if args.serve == "asgi":
+        return serve_asgi(args.port, args.llm_latency)
+
+    path, body = "/generate-questions", {"topics": ["Python"]}
+    targets = [("threaded", args.flask_url, 5101), ("asgi", args.asgi_url, 5102)]
+    results = {
+        "llm_latency_s": None if args.flask_url and args.asgi_url else args.llm_latency,
+        "flask_threads": args.threads,
+    }
+    for name, url, port in targets:
+        proc = None
+        if not url:
+            url = f"http://127.0.0.1:{port}"
+            proc = start_server("flask" if name == "threaded" else "asgi", port, args)
+        try:
+            wait_until_up(url)
+            results[name] = asyncio.run(run_load(url, path, body, args.requests, args.concurrency, args.timeout))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+        print(f"{name:>9}: {results[name]}")
+
+    if args.out:
+        save_json(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Compare loading the catalog from the CSV (pandas) with the binary catalog
+# (catalog_store.py): load time, resident memory after the load, and the time
+# to gather result rows. Each load runs in a fresh interpreter so RSS is not
+# shared between the two.
+#
+#   python -m benchmarks.bench_catalog --n 100000
+#   python -m benchmarks.bench_catalog --csv Coursera.csv --runs 5 --out catalog.json
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from benchmarks.common import percentiles, save_json, synthetic_catalog
+
+PROBE = """
+import json, sys, time
+import numpy as np
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+import catalog_store, database
+before = rss_mb()
+start = time.perf_counter()
+if MODE == "csv":
+    columns = catalog_store.frame_columns(database.load_data(PATH))
+else:
+    columns, _ = catalog_store.read_catalog(PATH, mmap=MODE == "binary-mmap")
+load = time.perf_counter() - start
+after = rss_mb()
+
+rng = np.random.default_rng(0)
+n = len(next(iter(columns.values())))
+gathers = []
+for _ in range(200):
+    ids = rng.integers(0, n, 10)
+    start = time.perf_counter()
+    [list(columns[name][ids]) for name in columns]
+    gathers.append(time.perf_counter() - start)
+print(json.dumps({"load": load, "rss_mb": after - before, "gathers": gathers}))
+"""
+
+
+def run_probe(mode, path):
+    code = f"MODE = {mode!r}\nPATH = {path!r}\n{PROBE}"
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs binary catalog loading")
+    parser.add_argument("--n", type=int, default=100000, help="synthetic catalog size")
+    parser.add_argument("--csv", help="use this catalog CSV instead of a synthetic one")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    from catalog_store import write_catalog
+    from database import load_data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv or os.path.join(tmp, "catalog.csv")
+        if not args.csv:
+            synthetic_catalog(args.n).to_csv(csv_path, index=False)
+        bin_path = os.path.join(tmp, "catalog.bin")
+        df = load_data(csv_path)
+        write_catalog(df, bin_path)
+        print(f"{len(df)} rows: CSV {os.path.getsize(csv_path) / 1e6:.1f} MB, "
+              f"binary {os.path.getsize(bin_path) / 1e6:.1f} MB")
+
+        results = {"rows": len(df), "modes": {}}
+        for mode, path in (("csv", csv_path), ("binary", bin_path), ("binary-mmap", bin_path)):
+            loads, rss, gathers = [], [], []
+            for _ in range(args.runs):
+                result = run_probe(mode, path)
+                loads.append(result["load"])
+                rss.append(result["rss_mb"])
+                gathers += result["gathers"]
+            results["modes"][mode] = {
+                "load": percentiles(loads),
+                "rss_mb": round(float(np.median(rss)), 1),
+                "gather_10_rows": percentiles(gathers),
+            }
+            print(f"  {mode:<12} load p50 {results['modes'][mode]['load']['p50_ms']:>9.1f} ms   "
+                  f"rss +{results['modes'][mode]['rss_mb']:>7.1f} MB   "
+                  f"gather p50 {results['modes'][mode]['gather_10_rows']['p50_ms']:.3f} ms")
+
+    if args.out:
+        save_json(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
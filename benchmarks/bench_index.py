@@ -0,0 +1,102 @@
+# Compare FAISS index modes on one catalog: build time, memory, search
+# latency (one query per call, like /recommend) and recall@k against the
+# exact flat index.
+#
+#   python -m benchmarks.bench_index --n 100000 --dim 384
+#   python -m benchmarks.bench_index --embeddings embeddings.npy --nprobe 8,16,64
+import argparse
+import time
+
+import faiss
+import numpy as np
+from config import Config
+from database import build_faiss_index, configure_index
+from benchmarks.common import percentiles, save_json, synthetic_embeddings, time_each
+
+
+def recall_at_k(truth, found):
+    k = truth.shape[1]
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / (len(truth) * k)
+
+
+def measure(index, queries, truth, k):
+    _, found = index.search(queries, k)
+    latency = time_each(lambda q: index.search(q, k), [q.reshape(1, -1) for q in queries])
+    return {
+        "recall_at_k": round(recall_at_k(truth, found), 4),
+        **percentiles(latency),
+        "qps": round(len(queries) / sum(latency), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flat, IVF and HNSW indexes")
+    parser.add_argument("--n", type=int, default=100000, help="synthetic catalog size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--embeddings", help="use vectors from this .npy instead of synthetic ones")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--modes", default="flat,ivf,hnsw")
+    parser.add_argument("--nprobe", default="4,16,64", help="IVF nprobe values to sweep")
+    parser.add_argument("--ef-search", default="32,64,128", help="HNSW efSearch values to sweep")
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads")
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    if args.embeddings:
+        data = np.load(args.embeddings).astype("float32")
+        faiss.normalize_L2(data)
+    else:
+        data = synthetic_embeddings(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    queries = data[rng.choice(len(data), args.queries)] + 0.05 * rng.standard_normal((args.queries, data.shape[1])).astype("float32")
+    faiss.normalize_L2(queries)
+
+    # Ground truth only; the flat row below builds and times its own index
+    _, truth = build_faiss_index(data, "flat").search(queries, args.k)
+
+    print(f"{len(data)} vectors x {data.shape[1]} dims, {args.queries} queries, k={args.k}")
+    results = []
+    for mode in args.modes.split(","):
+        start = time.perf_counter()
+        index = build_faiss_index(data, mode)
+        build_s = time.perf_counter() - start
+        memory_mb = faiss.serialize_index(index).nbytes / 2**20
+
+        if mode == "ivf":
+            sweep = [("nprobe", int(v)) for v in args.nprobe.split(",")]
+        elif mode == "hnsw":
+            sweep = [("efSearch", int(v)) for v in args.ef_search.split(",")]
+        else:
+            sweep = [(None, None)]
+
+        for param, value in sweep:
+            if param == "nprobe":
+                faiss.extract_index_ivf(index).nprobe = value
+            elif param == "efSearch":
+                faiss.downcast_index(index).hnsw.efSearch = value
+            row = {
+                "mode": mode,
+                "param": f"{param}={value}" if param else "",
+                "build_s": round(build_s, 3),
+                "memory_mb": round(memory_mb, 1),
+                **measure(index, queries, truth, args.k),
+            }
+            results.append(row)
+            print(f"{row['mode']:5} {row['param']:13} recall@{args.k}={row['recall_at_k']:.3f} "
+                  f"p50={row['p50_ms']:.3f}ms p99={row['p99_ms']:.3f}ms qps={row['qps']:.0f} "
+                  f"build={row['build_s']:.1f}s mem={row['memory_mb']:.1f}MB")
+        configure_index(index)
+
+    if args.out:
+        save_json(args.out, {
+            "n": len(data), "dim": int(data.shape[1]), "k": args.k,
+            "ivf_nlist": Config.IVF_NLIST or "auto", "hnsw_m": Config.HNSW_M,
+            "results": results,
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Search latency and throughput of a sharded index as the shard count grows,
+# with shards on threads in this process or in local worker processes.
+# Shards are flat by default, so every shard count returns the exact top-k
+# and recall against one shard stays at 1.0.
+#
+#   python -m benchmarks.bench_shards --n 500000 --dim 256 --shards 1,2,4,8
+#   python -m benchmarks.bench_shards --modes processes --index-type hnsw --out shards.json
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+import numpy as np
+from benchmarks.common import percentiles, save_json, synthetic_embeddings, time_each
+from sharded_index import load_sharded_index, write_sharded_index
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+
+def recall_at_k(truth, found):
+    k = truth.shape[1]
+    return sum(len(set(t) & set(f)) for t, f in zip(truth, found)) / (len(truth) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sharded index search")
+    parser.add_argument("--n", type=int, default=200000, help="synthetic catalog size")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--shards", default="1,2,4,8")
+    parser.add_argument("--modes", default="threads,processes")
+    parser.add_argument("--index-type", default="flat", choices=["flat", "ivf", "hnsw"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32, help="queries per call in the throughput run")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    data = synthetic_embeddings(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    queries = data[rng.choice(len(data), args.queries)] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    print(f"{args.n} vectors x {args.dim} dims, {args.index_type} shards, {os.cpu_count()} CPUs, k={args.k}")
+
+    results = {"n": args.n, "dim": args.dim, "index_type": args.index_type, "cpus": os.cpu_count(), "runs": []}
+    truth = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for shards in [int(s) for s in args.shards.split(",")]:
+            path = os.path.join(tmp, f"s{shards}", "index.faiss")
+            os.makedirs(os.path.dirname(path))
+            start = time.perf_counter()
+            write_sharded_index(data, path, shards, args.index_type)
+            build = time.perf_counter() - start
+
+            for mode in args.modes.split(","):
+                before = rss_mb()
+                start = time.perf_counter()
+                index = load_sharded_index(path, mmap=False, processes=mode == "processes")
+                load = time.perf_counter() - start
+                rss = rss_mb() - before
+
+                _, found = index.search(queries, args.k)
+                if truth is None:
+                    truth = found
+                latency = time_each(lambda q: index.search(q, args.k), [q.reshape(1, -1) for q in queries])
+                batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+                batch_time = sum(time_each(lambda b: index.search(b, args.k), batches))
+                # Drop the shards before the next run so its RSS baseline is clean
+                index.close()
+                del index
+                gc.collect()
+
+                run = {
+                    "shards": shards,
+                    "mode": mode,
+                    "build_s": round(build, 3),
+                    "load_s": round(load, 3),
+                    "server_rss_mb": round(rss, 1),
+                    "recall_at_k": round(recall_at_k(truth, found), 4),
+                    "single": percentiles(latency),
+                    "batch_qps": round(len(queries) / batch_time, 1),
+                }
+                results["runs"].append(run)
+                print(f"  {shards:>2} shards {mode:<9} p50 {run['single']['p50_ms']:>8.2f} ms  "
+                      f"p99 {run['single']['p99_ms']:>8.2f} ms  batch {run['batch_qps']:>9.1f} q/s  "
+                      f"recall {run['recall_at_k']:.3f}  server rss +{run['server_rss_mb']:.0f} MB")
+
+    if args.out:
+        save_json(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Measure how long a fresh worker takes to become useful: importing the app
+# module, create_app(), the first GET / and the first /recommend (which loads
+# the catalog and index unless WARM_UP_ON_START moved that into create_app).
+# Every run is a new interpreter, like a worker boot.
+#
+#   python -m benchmarks.bench_startup --runs 10
+#   python -m benchmarks.bench_startup --app asgi --warm-up --out startup.json
+#
+# Use EMBEDDING_BACKEND=hashing to keep the /recommend step offline.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import percentiles, save_json
+
+HEAVY_MODULES = ("faiss", "pandas", "openai", "httpx", "numpy", "psycopg2", "asyncpg")
+
+FLASK_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+heavy = [m for m in HEAVY if m in sys.modules]
+flask_app = app.create_app()
+t2 = time.perf_counter()
+client = flask_app.test_client()
+client.get("/")
+t3 = time.perf_counter()
+status = client.get("/recommend", query_string={"query": QUERY}).status_code
+t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_home": t3 - t2,
+                  "first_recommend": t4 - t3, "recommend_status": status, "heavy_after_import": heavy}))
+"""
+
+ASGI_PROBE = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import asgi_app
+t1 = time.perf_counter()
+heavy = [m for m in HEAVY if m in sys.modules]
+
+async def main():
+    t1b = time.perf_counter()
+    app = asgi_app.create_asgi_app()
+    async with app.test_app() as test_app:
+        t2 = time.perf_counter()
+        client = test_app.test_client()
+        await client.get("/")
+        t3 = time.perf_counter()
+        status = (await client.get("/recommend", query_string={"query": QUERY})).status_code
+        t4 = time.perf_counter()
+    return {"import": t1 - t0, "create_app": t2 - t1b, "first_home": t3 - t2,
+            "first_recommend": t4 - t3, "recommend_status": status, "heavy_after_import": heavy}
+
+print(json.dumps(asyncio.run(main())))
+"""
+
+STEPS = ("interpreter", "import", "create_app", "first_home", "first_recommend")
+
+
+def run_once(probe, query, env):
+    code = f"HEAVY = {HEAVY_MODULES!r}\nQUERY = {query!r}\n{probe}"
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    # The app prints while it loads; the probe's JSON is the last line
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def interpreter_time(env):
+    # Bare interpreter start and exit, the floor under every step above
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app import and first-request latency")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app", choices=["flask", "asgi"], default="flask")
+    parser.add_argument("--warm-up", action="store_true", help="set WARM_UP_ON_START=true")
+    parser.add_argument("--query", default="python for data analysis")
+    parser.add_argument("--out", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), WARM_UP_ON_START="true" if args.warm_up else "false")
+    probe = FLASK_PROBE if args.app == "flask" else ASGI_PROBE
+
+    samples = {step: [] for step in STEPS}
+    heavy = None
+    for _ in range(args.runs):
+        result = run_once(probe, args.query, env)
+        heavy = result["heavy_after_import"]
+        if result["recommend_status"] != 200:
+            print(f"warning: /recommend returned {result['recommend_status']}")
+        samples["interpreter"].append(interpreter_time(env))
+        for step in STEPS[1:]:
+            samples[step].append(result[step])
+
+    results = {
+        "app": args.app,
+        "warm_up_on_start": args.warm_up,
+        "runs": args.runs,
+        "heavy_modules_after_import": heavy,
+        "steps": {step: percentiles(values) for step, values in samples.items()},
+    }
+    totals = [sum(samples[step][i] for step in STEPS[1:]) for i in range(args.runs)]
+    results["import_to_first_recommend"] = percentiles(totals)
+
+    print(f"{args.app}, {args.runs} runs, warm_up_on_start={args.warm_up}")
+    print(f"heavy modules after import: {', '.join(heavy) or 'none'}")
+    for step, stats in results["steps"].items():
+        print(f"  {step:<16} p50 {stats['p50_ms']:>9.1f} ms   p99 {stats['p99_ms']:>9.1f} ms")
+    print(f"  {'total':<16} p50 {results['import_to_first_recommend']['p50_ms']:>9.1f} ms")
+
+    if args.out:
+        save_json(args.out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# Offline micro-benchmarks for the recommender hot paths, on synthetic
+# catalogs of several sizes:
+#
+#   csv_load       database.load_data on the catalog CSV
+#   catalog_load   catalog_store.read_catalog (memory-mapped binary catalog)
+#   index_build    database.build_faiss_index (INDEX_TYPE=auto picks the type)
+#   search         index.search, one query per call like /recommend
+#   search_batch   index.search, --batch queries per call like /recommend/batch
+#   assemble       recommender._courses, turning hits into result dicts
+#   recommend      recommend_courses end to end with a warm query cache
+#   json_repair    _clean_and_parse_json on typical model outputs
+#
+# Queries are embedded by the local hashing backend and catalog vectors are
+# synthetic, so nothing calls the API. Results are saved as JSON; pass an
+# earlier file as --baseline to see what got slower or faster.
+#
+#   python -m benchmarks.bench_suite --out bench.json
+#   python -m benchmarks.bench_suite --sizes 5,3000 --baseline bench.json --fail-on-regression
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from benchmarks.common import percentiles, save_json, synthetic_catalog, synthetic_embeddings, time_each
+from config import Config
+
+JSON_SAMPLES = {
+    "clean": json.dumps([{"title": f"Step {i}", "description": "Learn the basics " * 5} for i in range(12)]),
+    "fenced": "```json\n" + json.dumps({"courses": [{"name": f"Course {i}", "why": "Fits the goal"} for i in range(8)]}, indent=2) + "\n```",
+    "newlines": '{"skill": "SQL",\n "questions": [\n' + ",\n".join(f'  "Question {i}?"' for i in range(18)) + "\n]}",
+    "trailing_commas": '[{"topic": "Python", "level": "beginner",}, {"topic": "SQL", "level": "advanced",},]',
+}
+
+
+def stats(samples, units_per_sample=1, unit="ops"):
+    # percentiles plus throughput in `unit`/s over the summed time
+    result = percentiles(samples)
+    result["throughput"] = round(units_per_sample * len(samples) / max(sum(samples), 1e-12), 1)
+    result["unit"] = f"{unit}/s"
+    return result
+
+
+def repeat(fn, times):
+    return time_each(lambda _: fn(), range(times))
+
+
+def bench_size(n, args, tmp):
+    from catalog_store import read_catalog, write_catalog
+    from database import build_faiss_index, load_data
+    import recommender
+
+    results = {}
+    # Loading and building 100k+ rows once is enough to see a change
+    slow_repeats = args.repeats if n < 100000 else 1
+
+    df = synthetic_catalog(n, description_words=args.description_words)
+    csv_path = os.path.join(tmp, f"catalog-{n}.csv")
+    bin_path = os.path.join(tmp, f"catalog-{n}.bin")
+    df.to_csv(csv_path, index=False)
+    write_catalog(df.fillna(""), bin_path)
+    del df
+
+    results["csv_load"] = stats(repeat(lambda: load_data(csv_path), slow_repeats), n, "rows")
+    results["catalog_load"] = stats(repeat(lambda: read_catalog(bin_path), args.repeats), n, "rows")
+    catalog, _ = read_catalog(bin_path)
+
+    data = synthetic_embeddings(n, args.dim)
+    indexes = []
+    results["index_build"] = stats(repeat(lambda: indexes.append(build_faiss_index(data, args.index_type)), slow_repeats), n, "vectors")
+    index = indexes[-1]
+    del indexes[:-1]
+
+    rng = np.random.default_rng(1)
+    picks = rng.choice(n, args.queries)
+    queries = data[picks] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    k = min(args.k, n)
+    results["search"] = stats(time_each(lambda q: index.search(q, k), [q.reshape(1, -1) for q in queries]), unit="queries")
+    batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+    results["search_batch"] = stats(time_each(lambda b: index.search(b, k), batches), args.batch, "queries")
+
+    hits = [index.search(q.reshape(1, -1), k) for q in queries]
+    results["assemble"] = stats(
+        time_each(lambda h: recommender._courses(catalog, h[0][0], h[1][0]), hits), unit="results"
+    )
+
+    # End to end through recommend_courses; the query cache is warmed first
+    # so this measures embedding lookup, search and assembly, not hashing
+    recommender._loaded = recommender.LoadedCatalog(catalog, index)
+    texts = [f"course {i} word{i % 5000}" for i in range(min(args.queries, 100))]
+    for text in texts:
+        recommender.recommend_courses(text, k)
+    results["recommend"] = stats(time_each(lambda t: recommender.recommend_courses(t, k), texts), unit="queries")
+    recommender._loaded = None
+    return results
+
+
+def bench_json_repair(repeats):
+    from services.recommendation_service import _clean_and_parse_json
+    results = {}
+    for name, text in JSON_SAMPLES.items():
+        # The repair path prints the parse error; keep that out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            samples = time_each(_clean_and_parse_json, [text] * repeats)
+        results[name] = stats(samples, unit="docs")
+    return results
+
+
+def environment():
+    import faiss
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "faiss": faiss.__version__,
+        "cpus": os.cpu_count(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def flatten(results):
+    # {"100000/search": stats, "json_repair/fenced": stats, ...}
+    flat = {}
+    for size, cases in results["sizes"].items():
+        for case, value in cases.items():
+            flat[f"{size}/{case}"] = value
+    for name, value in results["json_repair"].items():
+        flat[f"json_repair/{name}"] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print p50 changes against `baseline` and return the keys that got slower
+    by more than `tolerance` (a fraction, 0.1 = 10%).
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    print(f"\nAgainst baseline {baseline.get('environment', {}).get('commit') or ''} (tolerance {tolerance:.0%}):")
+    for key, now in current.items():
+        before = previous.get(key)
+        if before is None or not before["p50_ms"]:
+            continue
+        ratio = now["p50_ms"] / before["p50_ms"]
+        verdict = "slower" if ratio > 1 + tolerance else "faster" if ratio < 1 - tolerance else "same"
+        if verdict == "slower":
+            regressions.append(key)
+        print(f"  {key:<28} {before['p50_ms']:>10.3f} -> {now['p50_ms']:>10.3f} ms  x{ratio:5.2f}  {verdict}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for the recommender")
+    parser.add_argument("--sizes", default="5,3000,100000,1000000", help="catalog sizes to run")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--index-type", default="auto", choices=["auto", "flat", "ivf", "hnsw"])
+    parser.add_argument("--description-words", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5, help="runs of the load and build steps")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    # The stub embedder: hashed character n-grams, in the index's dimension
+    Config.EMBEDDING_BACKEND = "hashing"
+    Config.HASHING_EMBEDDING_DIM = args.dim
+
+    results = {"environment": environment(), "args": vars(args), "sizes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(s) for s in args.sizes.split(",")]:
+            print(f"{n} rows")
+            results["sizes"][str(n)] = bench_size(n, args, tmp)
+            for case, value in results["sizes"][str(n)].items():
+                print(f"  {case:<14} p50 {value['p50_ms']:>10.3f} ms  p99 {value['p99_ms']:>10.3f} ms  "
+                      f"{value['throughput']:>12.1f} {value['unit']}")
+    results["json_repair"] = bench_json_repair(args.queries * 10)
+    print("json_repair")
+    for name, value in results["json_repair"].items():
+        print(f"  {name:<16} p50 {value['p50_ms']:>8.4f} ms  p99 {value['p99_ms']:>8.4f} ms  "
+              f"{value['throughput']:>10.1f} {value['unit']}")
+
+    if args.out:
+        save_json(args.out, results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
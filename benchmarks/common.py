@@ -0,0 +1,67 @@
+# Helpers shared by the scripts in benchmarks/. Run them from the repo root,
+# e.g. `python -m benchmarks.bench_index`, so the app modules are importable.
+import json
+import time
+
+import numpy as np
+
+
+def percentiles(samples):
+    # samples are durations in seconds
+    arr = np.asarray(samples, dtype="float64") * 1000
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 4),
+        "p99_ms": round(float(np.percentile(arr, 99)), 4),
+        "mean_ms": round(float(arr.mean()), 4),
+    }
+
+
+def time_each(fn, items):
+    # Call fn once per item and return the per-call durations
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def synthetic_embeddings(n, dim, clusters=256, seed=0, noise=0.35):
+    """
+    L2-normalized vectors drawn around `clusters` random centres, which is
+    closer to real text embeddings than uniform noise (and harder for ANN
+    indexes to get wrong by luck). Generated in chunks to bound peak memory.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype("float32")
+    out = np.empty((n, dim), dtype="float32")
+    for start in range(0, n, 100000):
+        stop = min(n, start + 100000)
+        labels = rng.integers(0, clusters, stop - start)
+        chunk = centres[labels] + noise * rng.standard_normal((stop - start, dim)).astype("float32")
+        chunk /= np.linalg.norm(chunk, axis=1, keepdims=True)
+        out[start:stop] = chunk
+    return out
+
+
+def synthetic_catalog(n, seed=0, description_words=150):
+    # DataFrame shaped like the Coursera export; 150 words is ~1 KB per description
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    words = np.array([f"word{i}" for i in range(5000)])
+    universities = [f"University {i}" for i in range(200)]
+    return pd.DataFrame({
+        "Course Name": [f"Course {i}" for i in range(n)],
+        "University": rng.choice(universities, n),
+        "Difficulty Level": rng.choice(["Beginner", "Intermediate", "Advanced", "Mixed"], n),
+        "Course Rating": rng.choice(np.round(np.arange(3.0, 5.01, 0.1), 1), n),
+        "Course URL": [f"https://www.coursera.org/learn/course-{i}" for i in range(n)],
+        "Course Description": [" ".join(rng.choice(words, description_words)) for _ in range(n)],
+        "Skills": [" ".join(rng.choice(words, 8)) for _ in range(n)],
+    })
+
+
+def save_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"Results written to {path}")
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with LRU eviction and per-entry expiry.
+    ttl=None keeps entries until they are evicted.
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SemanticCache:
+    """
+    Cache keyed by embedding vectors instead of exact strings. A lookup
+    returns the value stored under the most similar earlier key when the
+    cosine similarity reaches `threshold`. Entries live in one small FAISS
+    index per namespace; the oldest are dropped once a namespace holds
+    `maxsize` entries.
+    """
+
+    def __init__(self, threshold, maxsize=1000, ttl=None):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._namespaces = {}   # namespace -> (index, [(value, expires_at)])
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.array(vector, dtype="float32").reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(self, namespace, vector):
+        vector = self._normalize(vector)
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is not None and entry[0].ntotal and entry[0].d == vector.shape[1]:
+                index, values = entry
+                while index.ntotal:
+                    scores, ids = index.search(vector, 1)
+                    if scores[0][0] < self.threshold:
+                        break
+                    i = int(ids[0][0])
+                    value, expires_at = values[i]
+                    if expires_at is None or expires_at > time.monotonic():
+                        self.hits += 1
+                        return value
+                    # Drop the expired entry so a refreshed one can win next time
+                    index.remove_ids(np.array([i], dtype="int64"))
+                    del values[i]
+            self.misses += 1
+            return None
+
+    def set(self, namespace, vector, value):
+        vector = self._normalize(vector)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is None or entry[0].d != vector.shape[1]:
+                import faiss
+                entry = (faiss.IndexFlatIP(vector.shape[1]), [])
+                self._namespaces[namespace] = entry
+            index, values = entry
+            if index.ntotal >= self.maxsize:
+                # IndexFlat renumbers after removal, keeping ids aligned with values
+                drop = index.ntotal - self.maxsize + 1
+                index.remove_ids(np.arange(drop, dtype="int64"))
+                del values[:drop]
+            index.add(vector)
+            values.append((value, expires_at))
+
+    def clear(self):
+        with self._lock:
+            self._namespaces.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "threshold": self.threshold,
+                "size": {ns: entry[0].ntotal for ns, entry in self._namespaces.items()},
+                "max_size": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,150 @@
+import math
+from bisect import bisect_left
+
+import numpy as np
+from catalog_store import factorize
+from database import index_type_of
+
+# Catalog column behind each filter. Categorical filters take one value or a
+# list (matched case-insensitively); min_rating keeps ratings >= the value.
+FILTER_COLUMNS = {
+    "difficulty": "Difficulty Level",
+    "university": "University",
+}
+RATING_COLUMN = "Course Rating"
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _pack(mask):
+    # FAISS IDSelectorBitmap reads bit (id & 7) of byte (id >> 3)
+    return np.packbits(mask, bitorder="little")
+
+
+def _normalize(value):
+    return " ".join(str(value).lower().split())
+
+
+class CatalogFilters:
+    """
+    Packed per-value bitmaps over catalog row ids, built once when the
+    catalog loads. A filter is a few bitwise ANDs/ORs over n/8 bytes, and the
+    result is applied inside the FAISS search through IDSelectorBitmap, so
+    filtered queries still return a full top_k without over-fetching.
+    """
+
+    def __init__(self, catalog, n):
+        self.n = n
+        self.full = _pack(np.ones(n, dtype=bool))
+        self.facets = {}
+        self.labels = {}    # normalized value -> spelling in the catalog
+        for name, column in FILTER_COLUMNS.items():
+            if column not in catalog:
+                continue
+            codes, raw_values = _categories(catalog[column])
+            # Spellings that normalize to the same value share one bitmap
+            groups = {}
+            self.labels[name] = {}
+            for code, raw in enumerate(raw_values):
+                value = _normalize(raw)
+                if value:
+                    groups.setdefault(value, []).append(code)
+                    self.labels[name].setdefault(value, str(raw).strip())
+            self.facets[name] = {value: _pack(np.isin(codes, group)) for value, group in groups.items()}
+
+        # One "rating >= r" bitmap per distinct rating; min_rating picks the
+        # first threshold at or above it
+        self.rating_thresholds = []
+        self.rating_bitmaps = []
+        if RATING_COLUMN in catalog:
+            codes, raw_values = _categories(catalog[RATING_COLUMN])
+            ratings = np.array([_to_float(v) for v in raw_values], dtype="float64")[codes]
+            for r in np.unique(ratings[~np.isnan(ratings)]):
+                self.rating_thresholds.append(float(r))
+                self.rating_bitmaps.append(_pack(ratings >= r))
+
+    def values(self, name):
+        return sorted(self.labels[name][value] for value in self.facets.get(name, {}))
+
+    def bitmap(self, filters):
+        """
+        Combined bitmap for `filters` ({"difficulty": ..., "university": ...,
+        "min_rating": ...}), or None when nothing is filtered.
+        Raises ValueError for unknown filter names.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v not in (None, "", [])}
+        if not filters:
+            return None
+        unknown = set(filters) - set(FILTER_COLUMNS) - {"min_rating"}
+        if unknown:
+            raise ValueError(f"unknown filter(s): {', '.join(sorted(unknown))}")
+
+        bitmap = self.full.copy()
+        empty = np.zeros_like(self.full)
+        for name, wanted in filters.items():
+            if name == "min_rating":
+                i = bisect_left(self.rating_thresholds, float(wanted))
+                bitmap &= self.rating_bitmaps[i] if i < len(self.rating_bitmaps) else empty
+                continue
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            facet = self.facets.get(name, {})
+            selected = empty.copy()
+            for value in wanted:
+                selected |= facet.get(_normalize(value), empty)
+            bitmap &= selected
+        return bitmap
+
+    @staticmethod
+    def count(bitmap):
+        return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+
+def _categories(column):
+    # (code per row, distinct values); the binary catalog already stores
+    # repeated columns this way
+    if hasattr(column, "codes"):
+        return column.codes, column.labels
+    return factorize(column)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+# Past this ratio of index size to selected rows, a filtered HNSW search
+# would need a candidate list close to the whole graph; scanning only the
+# selected rows of its flat storage is exact and cheaper
+HNSW_EXACT_WIDEN = 8
+
+
+def filtered_search(index, queries, top_k, bitmap, selected):
+    """
+    index.search restricted to the ids set in `bitmap`. IVF and HNSW only
+    visit part of the index, so with a selective filter they search
+    proportionally wider (more lists, a larger candidate list) to still find
+    top_k matching rows.
+    """
+    import faiss
+    sel = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+    widen = index.ntotal / max(selected, 1)
+    index_type = index_type_of(index)
+    if index_type == "ivf":
+        ivf = faiss.extract_index_ivf(index)
+        nprobe = min(ivf.nlist, max(ivf.nprobe, math.ceil(ivf.nprobe * widen)))
+        params = faiss.SearchParametersIVF(sel=sel, nprobe=nprobe)
+    elif index_type == "hnsw":
+        hnsw_index = faiss.downcast_index(index)
+        if widen > HNSW_EXACT_WIDEN:
+            index = faiss.downcast_index(hnsw_index.storage)
+            params = faiss.SearchParameters(sel=sel)
+        else:
+            ef = max(hnsw_index.hnsw.efSearch, top_k)
+            params = faiss.SearchParametersHNSW(sel=sel, efSearch=math.ceil(ef * widen))
+    else:
+        params = faiss.SearchParameters(sel=sel)
+    # `sel` only points into the bitmap, so both must outlive the search
+    return index.search(queries, top_k, params=params)
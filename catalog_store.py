@@ -0,0 +1,252 @@
+# catalog_store.py
+#
+# Compact binary form of the course catalog, written next to index.faiss so
+# the recommender does not parse the CSV on every start.
+#
+# One file: a fixed header, a JSON manifest, then 64-byte aligned NumPy
+# arrays. Each column is stored as
+#   text      UTF-8 bytes back to back plus int64 row offsets
+#   category  int32 codes per row plus the distinct values in the manifest
+#   number    a plain numeric array
+# Reading maps the file, so a column costs nothing until rows are gathered
+# from it, and all workers share the OS page cache copy. Row i of the file
+# is row i of the CSV and of the FAISS index; the manifest records the row
+# count and a hash of the index row keys so a mismatched pair is refused.
+#
+#   python catalog_store.py --csv Coursera.csv --out catalog.bin
+import argparse
+import hashlib
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"CRSCATLG"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIQ")    # magic, format version, manifest length
+_ALIGN = 64
+# Category labels live in the JSON manifest, so only short value lists qualify
+_MAX_LABELS = 1024
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def keys_hash(row_keys):
+    # sha256 of the index keys file as generate_embeddings.py writes it
+    return hashlib.sha256(json.dumps(list(row_keys)).encode("utf-8")).hexdigest()
+
+
+def keys_file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class TextColumn:
+    """Strings stored as one UTF-8 buffer; row i is data[offsets[i]:offsets[i + 1]]."""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _row(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __getitem__(self, ids):
+        if np.ndim(ids) == 0:
+            return self._row(int(ids))
+        return [self._row(i) for i in np.asarray(ids).tolist()]
+
+    def __iter__(self):
+        return (self._row(i) for i in range(len(self)))
+
+
+class CategoryColumn:
+    """Repeated values stored once; each row holds a code into `labels`."""
+
+    def __init__(self, codes, labels):
+        self.codes = codes
+        self.labels = np.empty(len(labels), dtype=object)
+        self.labels[:] = labels
+        self.labels.setflags(write=False)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, ids):
+        return self.labels[self.codes[ids]]
+
+    def __iter__(self):
+        return iter(self.labels[self.codes])
+
+
+class NumberColumn:
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, ids):
+        # Python numbers, so results serialize like the CSV-backed columns
+        return self.values[ids].tolist()
+
+    def __iter__(self):
+        return iter(self.values.tolist())
+
+
+def frame_columns(df):
+    # Read-only column arrays, so results are assembled with one fancy-index
+    # gather per column instead of a df.iloc lookup per hit
+    columns = {}
+    for name in df.columns:
+        values = df[name].to_numpy(dtype=object)
+        values.setflags(write=False)
+        columns[name] = values
+    return columns
+
+
+def factorize(values):
+    # (codes, labels) with labels in order of first appearance
+    seen = {}
+    codes = np.fromiter((seen.setdefault(v, len(seen)) for v in values), dtype=np.int32, count=len(values))
+    return codes, list(seen)
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _encode_column(values, numeric):
+    """(kind, arrays, labels) for one column of the catalog."""
+    codes, labels = factorize(values)
+    # Worth a lookup table once each value repeats at least twice on average
+    if len(labels) <= _MAX_LABELS and len(labels) * 2 <= len(values):
+        return "category", {"codes": codes}, [_plain(v) for v in labels]
+    if numeric:
+        return "number", {"values": np.asarray(values)}, None
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return "text", {"offsets": offsets, "data": np.frombuffer(b"".join(encoded), dtype=np.uint8)}, None
+
+
+def write_catalog(df, path, row_keys=None, source=None):
+    """
+    Write the catalog DataFrame (already fillna'd, in index row order) to
+    `path`. The file is written beside the target and renamed over it, so a
+    server that has the old one mapped keeps reading a complete file.
+    """
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "rows": len(df),
+        "created_at": time.time(),
+        "source": source,
+        "keys_sha256": keys_hash(row_keys) if row_keys is not None else None,
+        "columns": [],
+    }
+    blobs = []
+    offset = 0
+    for name in df.columns:
+        numeric = df[name].dtype.kind in "biuf"
+        values = df[name].to_numpy() if numeric else df[name].to_numpy(dtype=object)
+        kind, arrays, labels = _encode_column(values, numeric)
+        column = {"name": name, "kind": kind, "arrays": {}}
+        if labels is not None:
+            column["labels"] = labels
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            offset = _aligned(offset)
+            column["arrays"][key] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            blobs.append((offset, array))
+            offset += array.nbytes
+        manifest["columns"].append(column)
+
+    manifest_bytes = json.dumps(manifest).encode("utf-8")
+    data_start = _aligned(_HEADER.size + len(manifest_bytes))
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(manifest_bytes)))
+        f.write(manifest_bytes)
+        for start, array in blobs:
+            f.seek(data_start + start)
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+    return manifest
+
+
+def read_manifest(path):
+    with open(path, "rb") as f:
+        magic, version, length = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog file")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} has catalog format {version}; this build reads up to {FORMAT_VERSION}")
+        manifest = json.loads(f.read(length))
+    return manifest, _aligned(_HEADER.size + length)
+
+
+def read_catalog(path, mmap=True):
+    """
+    Columns by name, as TextColumn/CategoryColumn/NumberColumn, plus the
+    manifest. With mmap the arrays are read-only views of the mapped file.
+    """
+    manifest, data_start = read_manifest(path)
+    if mmap and os.path.getsize(path) > data_start:
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        buf = np.fromfile(path, dtype=np.uint8)
+        buf.setflags(write=False)
+
+    def array(spec):
+        dtype = np.dtype(spec["dtype"])
+        start = data_start + spec["offset"]
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        return buf[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    columns = {}
+    for column in manifest["columns"]:
+        arrays = {key: array(spec) for key, spec in column["arrays"].items()}
+        if column["kind"] == "text":
+            columns[column["name"]] = TextColumn(arrays["offsets"], arrays["data"])
+        elif column["kind"] == "category":
+            columns[column["name"]] = CategoryColumn(arrays["codes"], column["labels"])
+        elif column["kind"] == "number":
+            columns[column["name"]] = NumberColumn(arrays["values"])
+        else:
+            raise ValueError(f"{path}: unknown column kind {column['kind']!r}")
+    return columns, manifest
+
+
+def main():
+    from config import Config
+    from database import course_texts, embedding_model, load_data
+    from embedding_store import embedding_key
+
+    parser = argparse.ArgumentParser(description="Convert the catalog CSV to the binary catalog format")
+    parser.add_argument("--csv", default=Config.DATASET_PATH)
+    parser.add_argument("--out", default=Config.CATALOG_PATH)
+    parser.add_argument("--no-keys", action="store_true",
+                        help="do not record the index row keys (skips the row order check on load)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    df = load_data(args.csv)
+    # The same keys generate_embeddings.py writes for the index rows
+    row_keys = None if args.no_keys else [embedding_key(embedding_model(), t) for t in course_texts(df)]
+    manifest = write_catalog(df, args.out, row_keys, source=os.path.basename(args.csv))
+    kinds = ", ".join(f"{c['name']}: {c['kind']}" for c in manifest["columns"])
+    print(f"Wrote {manifest['rows']} rows to {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB) "
+          f"in {time.perf_counter() - started:.2f}s")
+    print(kinds)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,4 +8,148 @@ class Config:
     DB_NAME = "postgres"
     DB_USER = "postgres"
     DB_PASSWORD = "123"
-    
+
+    # Connection pool shared by every service function (see db.get_db)
+    DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+    DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", 30))
+
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    MCQ_MODEL = os.getenv("MCQ_MODEL", "gpt-4")
+
+    # HTTP settings of the shared OpenAI client (see llm.get_openai_client)
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))
+    LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 5))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 100))
+    LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20))
+    LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", 60))
+
+    # Catalog and vector index artifacts
+    DATASET_PATH = os.getenv("DATASET_PATH", "dataset.csv")
+    EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", "embeddings.npy")
+    INDEX_PATH = os.getenv("INDEX_PATH", "index.faiss")
+
+    # INDEX_MMAP maps index.faiss read-only instead of copying it into each
+    # process, so every worker shares the OS page cache copy.
+    INDEX_MMAP = os.getenv("INDEX_MMAP", "false").lower() == "true"
+
+    # Binary catalog built from DATASET_PATH (see catalog_store.py). When it
+    # exists the recommender reads it instead of the CSV, memory-mapped
+    # unless CATALOG_MMAP is false.
+    CATALOG_PATH = os.getenv("CATALOG_PATH", "catalog.bin")
+    CATALOG_MMAP = os.getenv("CATALOG_MMAP", "true").lower() == "true"
+
+    # Versioned artifact directories (see artifacts.py). When ARTIFACTS_DIR is
+    # set, builds publish into it and the paths above are not used. Servers
+    # swap to a newly published version on POST /admin/reload, or by polling
+    # every RELOAD_POLL_INTERVAL seconds (0 disables the watcher).
+    ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", "")
+    ARTIFACTS_KEEP = int(os.getenv("ARTIFACTS_KEEP", 3))
+    RELOAD_POLL_INTERVAL = float(os.getenv("RELOAD_POLL_INTERVAL", 0))
+    # Recent query vectors replayed against a new index before it is swapped
+    # in, so its pages and caches are warm when traffic reaches it
+    RELOAD_WARM_QUERIES = int(os.getenv("RELOAD_WARM_QUERIES", 256))
+
+    # Heavy modules (faiss, pandas, openai) and the index load on first use.
+    # WARM_UP_ON_START makes the app factories load them before serving
+    # instead, trading boot time for a fast first request.
+    WARM_UP_ON_START = os.getenv("WARM_UP_ON_START", "false").lower() == "true"
+
+    # Embedding backend: "openai" (EMBEDDING_MODEL) or "hashing", a local
+    # character n-gram vectorizer that needs no network (see embedding_backends.py).
+    # Rebuild the index with generate_embeddings.py after switching.
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", 1024))
+    HASHING_NGRAM_MIN = int(os.getenv("HASHING_NGRAM_MIN", 3))
+    HASHING_NGRAM_MAX = int(os.getenv("HASHING_NGRAM_MAX", 5))
+
+    # Vector index: "auto" (flat below INDEX_AUTO_FLAT_MAX rows, IVF above),
+    # "flat", "ivf" or "hnsw". IVF_NLIST=0 sizes the IVF lists from the catalog.
+    INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+    INDEX_AUTO_FLAT_MAX = int(os.getenv("INDEX_AUTO_FLAT_MAX", 50000))
+    IVF_NLIST = int(os.getenv("IVF_NLIST", 0))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", 16))
+    HNSW_M = int(os.getenv("HNSW_M", 32))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", 80))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 64))
+
+    # INDEX_SHARDS > 1 makes generate_embeddings.py split the index into that
+    # many row-range shards (see sharded_index.py). Each query searches every
+    # shard in parallel and merges their top-k. INDEX_SHARD_PROCESSES serves
+    # each shard from a local worker process instead of a thread; combine it
+    # with INDEX_MMAP so workers of several app processes share the pages.
+    INDEX_SHARDS = int(os.getenv("INDEX_SHARDS", 1))
+    INDEX_SHARD_PROCESSES = os.getenv("INDEX_SHARD_PROCESSES", "false").lower() == "true"
+
+    # Embedding build (see generate_embeddings.py)
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 100))
+    EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", 4))
+    EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", 5))
+    # Content-addressed vectors reused across rebuilds, and the store key of
+    # every index row so the next build can update the index incrementally
+    EMBEDDING_STORE_PATH = os.getenv("EMBEDDING_STORE_PATH", "embeddings.sqlite")
+    INDEX_KEYS_PATH = os.getenv("INDEX_KEYS_PATH", "index_keys.json")
+
+    # Query embedding cache used by recommend_courses (see database.embed_query).
+    # QUERY_CACHE_PATH enables the on-disk tier; leave empty to keep it in memory only.
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 10000))
+    QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 7 * 24 * 3600))
+    QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", "")
+
+    # Largest number of queries accepted by POST /recommend/batch, and the
+    # largest top_k either recommend endpoint will search for
+    RECOMMEND_BATCH_MAX = int(os.getenv("RECOMMEND_BATCH_MAX", 50))
+    RECOMMEND_TOP_K_MAX = int(os.getenv("RECOMMEND_TOP_K_MAX", 500))
+
+    # GET /user-recommendation/<id>: "llm" has the model suggest courses from
+    # scratch, "catalog" returns the nearest courses in our own index, and
+    # "hybrid" retrieves USER_RECOMMENDATION_CANDIDATES courses from the index
+    # and has the model pick and justify up to USER_RECOMMENDATION_RESULTS.
+    USER_RECOMMENDATION_MODE = os.getenv("USER_RECOMMENDATION_MODE", "llm")
+    USER_RECOMMENDATION_CANDIDATES = int(os.getenv("USER_RECOMMENDATION_CANDIDATES", 20))
+    USER_RECOMMENDATION_RESULTS = int(os.getenv("USER_RECOMMENDATION_RESULTS", 8))
+    CATALOG_PLATFORM = os.getenv("CATALOG_PLATFORM", "Coursera")
+
+    # Goal roadmaps from get_required_step_by_user_goal are cached in the
+    # goal_roadmap_cache table, keyed by normalized goal, prompt version and model
+    ROADMAP_CACHE_ENABLED = os.getenv("ROADMAP_CACHE_ENABLED", "true").lower() == "true"
+    ROADMAP_CACHE_TTL = int(os.getenv("ROADMAP_CACHE_TTL", 30 * 24 * 3600))
+
+    # Semantic cache for get_recommendation_based_on_skill: a stored answer is
+    # reused for the same skill level when the topic embeddings have at least
+    # this cosine similarity. Tune per embedding backend; the hashing backend
+    # scores paraphrases lower than text-embedding-3-small.
+    SKILL_CACHE_ENABLED = os.getenv("SKILL_CACHE_ENABLED", "true").lower() == "true"
+    SKILL_CACHE_THRESHOLD = float(os.getenv("SKILL_CACHE_THRESHOLD", 0.9))
+    SKILL_CACHE_SIZE = int(os.getenv("SKILL_CACHE_SIZE", 2000))
+    SKILL_CACHE_TTL = float(os.getenv("SKILL_CACHE_TTL", 7 * 24 * 3600))
+
+    # Per-process user profile cache (see services.user_service.get_profile).
+    # Writes through this process invalidate it; the TTL bounds how long other
+    # processes can serve a profile that was changed elsewhere.
+    PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", 1024))
+    PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", 300))
+
+    # POST /user-goals background mode: steps are generated by a pool of
+    # GOAL_JOB_WORKERS threads. GOAL_JOBS_ASYNC makes it the default.
+    GOAL_JOB_WORKERS = int(os.getenv("GOAL_JOB_WORKERS", 4))
+    GOAL_JOBS_ASYNC = os.getenv("GOAL_JOBS_ASYNC", "false").lower() == "true"
+
+    # POST /generate-questions fan-out mode: one LLM request per topic, at most
+    # QUESTION_FANOUT_CONCURRENCY at once, failed topics retried on their own.
+    # Used when the request sets "fanout", or automatically for at least
+    # QUESTION_FANOUT_MIN_TOPICS topics (0 disables the automatic switch).
+    QUESTION_FANOUT_CONCURRENCY = int(os.getenv("QUESTION_FANOUT_CONCURRENCY", 8))
+    QUESTION_FANOUT_RETRIES = int(os.getenv("QUESTION_FANOUT_RETRIES", 2))
+    QUESTION_FANOUT_MIN_TOPICS = int(os.getenv("QUESTION_FANOUT_MIN_TOPICS", 0))
+
+    # Where POST /generate-mcq gets its questions: "llm" generates a fresh
+    # set per request, "bank" samples the mcq_bank table filled by run_mcq.py,
+    # "auto" samples the bank and falls back to the model for unknown skills
+    MCQ_SOURCE = os.getenv("MCQ_SOURCE", "llm")
+    MCQ_SET_SIZE = int(os.getenv("MCQ_SET_SIZE", 18))
+    MCQ_BANK_PER_DIFFICULTY = int(os.getenv("MCQ_BANK_PER_DIFFICULTY", 30))
@@ -1,44 +1,220 @@
-import pandas as pd
-import faiss
+import os
+import threading
+
 import numpy as np
-from openai import OpenAI
+from cache import TTLCache
+from catalog_store import frame_columns, keys_file_hash, read_catalog
 from config import Config
+from embedding_backends import get_backend
+from embedding_store import EmbeddingStore, embedding_key
+from llm import get_openai_client
 
 def get_client():
-    api_key = Config.OPENAI_API_KEY
-    print("API KEY LOADED:", api_key)
-    return OpenAI(api_key=api_key)
+    return get_openai_client()
+
+def embed_batch(texts):
+    """
+    Embed a list of texts with the configured backend (one API request for
+    the OpenAI backend). Returns a float32 matrix with one row per input,
+    in input order.
+    """
+    return get_backend().embed_batch(texts)
+
+def embedding_model():
+    # Name of the vector space produced by embed/embed_batch
+    return get_backend().model_name
 
 def embed(text):
-    client = get_client()
-    res = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text
-    )
-    return np.array(res.data[0].embedding).astype('float32')
-
-# Load dataset file
-def load_data():
-    DATASET_PATH = "dataset.csv"
-
-    df = pd.read_csv(DATASET_PATH)
-    df.fillna("", inplace=True)
+    return embed_batch([text])[0]
+
+# Search queries repeat a lot, so their vectors are cached in memory and,
+# when QUERY_CACHE_PATH is set, in an EmbeddingStore that survives restarts.
+_query_cache = TTLCache(Config.QUERY_CACHE_SIZE, Config.QUERY_CACHE_TTL)
+_query_store = None
+_query_store_lock = threading.Lock()
+_query_store_hits = 0
+
+def _get_query_store():
+    global _query_store
+    if _query_store is None and Config.QUERY_CACHE_PATH:
+        with _query_store_lock:
+            if _query_store is None:
+                _query_store = EmbeddingStore(Config.QUERY_CACHE_PATH)
+    return _query_store
+
+def normalize_query(text):
+    return " ".join(text.lower().split())
+
+def embed_queries(texts):
+    """
+    Embeddings of search queries, served from the query cache when possible.
+    All cache misses are embedded together with one embed_batch call.
+    The returned arrays are shared with the cache and must not be modified.
+    """
+    global _query_store_hits
+    model = embedding_model()
+    queries = [normalize_query(t) for t in texts]
+    keys = [embedding_key(model, q) for q in queries]
+    vectors = [_query_cache.get(k) for k in keys]
+
+    missing = {k: q for k, q, v in zip(keys, queries, vectors) if v is None}
+    found = {}
+    if missing:
+        store = _get_query_store()
+        if store is not None:
+            found = store.get_many(list(missing), max_age=Config.QUERY_CACHE_TTL)
+            _query_store_hits += len(found)
+        to_embed = [k for k in missing if k not in found]
+        if to_embed:
+            embedded = embed_batch([missing[k] for k in to_embed])
+            found.update(zip(to_embed, embedded))
+            if store is not None:
+                store.put_many(to_embed, embedded)
+        for key, vector in found.items():
+            vector = np.array(vector, dtype="float32")
+            vector.setflags(write=False)
+            found[key] = vector
+            _query_cache.set(key, vector)
+
+    return [v if v is not None else found[k] for k, v in zip(keys, vectors)]
+
+def embed_query(text):
+    return embed_queries([text])[0]
+
+def query_cache_stats():
+    stats = _query_cache.stats()
+    stats["disk_enabled"] = bool(Config.QUERY_CACHE_PATH)
+    stats["disk_hits"] = _query_store_hits
+    return stats
+
+def course_texts(df):
+    # Text that gets embedded for each catalog row
+    return (df['Course Name'] + " " + df['Course Description'] + " " + df['Skills']).tolist()
+
+# Load dataset file. pandas and faiss are imported where they are used so
+# importing this module (and the app) does not pay for them up front.
+def load_data(path=None):
+    import pandas as pd
+    df = pd.read_csv(path or Config.DATASET_PATH)
+    df = df.fillna("")
     return df
 
-# Generate embedding
-def build_index(df):
-    course_texts = (df['Course Name'] + " " + df['Course Description'] + " " + df['Skills']).tolist()
+def load_catalog(path=None, mmap=None, keys_path=None):
+    """
+    Catalog columns by name, in index row order. Reads the binary catalog
+    (catalog_store.py) when it has been built, else parses the CSV. Raises
+    ValueError when the binary catalog was built for other index rows.
+    """
+    path = path or Config.CATALOG_PATH
+    keys_path = keys_path or Config.INDEX_KEYS_PATH
+    mmap = Config.CATALOG_MMAP if mmap is None else mmap
+    if not os.path.exists(path):
+        print(f"{path} not found, parsing {Config.DATASET_PATH}; run catalog_store.py to build it")
+        return frame_columns(load_data())
 
-    embeddings = np.array([embed(t) for t in course_texts], dtype="float32")
-    print(embeddings)
-    faiss.normalize_L2(embeddings)
+    columns, manifest = read_catalog(path, mmap=mmap)
+    if manifest.get("keys_sha256") and os.path.exists(keys_path):
+        if keys_file_hash(keys_path) != manifest["keys_sha256"]:
+            raise ValueError(
+                f"{path} does not match the rows in {keys_path}; "
+                "rebuild it with generate_embeddings.py or catalog_store.py"
+            )
+    return columns
 
-    index = faiss.IndexFlatIP(embeddings.shape[1])
-    index.add(embeddings)
+# Vector index types. "flat" scans every vector (exact), "ivf" scans the
+# IVF_NPROBE closest of IVF_NLIST clusters, "hnsw" walks a proximity graph.
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+def resolve_index_type(n, index_type=None):
+    index_type = index_type or Config.INDEX_TYPE
+    if index_type == "auto":
+        # Exact search is fast enough for small catalogs and needs no training
+        return "flat" if n < Config.INDEX_AUTO_FLAT_MAX else "ivf"
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown INDEX_TYPE: {index_type!r} (expected auto, flat, ivf or hnsw)")
+    return index_type
+
+def index_type_of(index):
+    import faiss
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+def ivf_nlist(n):
+    if Config.IVF_NLIST:
+        return Config.IVF_NLIST
+    # ~4*sqrt(n) lists, but keep at least 39 training points per centroid
+    return max(1, min(int(4 * np.sqrt(n)), n // 39))
+
+def configure_index(index):
+    import faiss
+    # Search-time knobs are not stored in the index file, so set them on load
+    index_type = index_type_of(index)
+    if index_type == "ivf":
+        faiss.extract_index_ivf(index).nprobe = Config.IVF_NPROBE
+    elif index_type == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = Config.HNSW_EF_SEARCH
     return index
 
-def load_index():
-    return faiss.read_index("index.faiss")
+def build_faiss_index(embeddings, index_type=None):
+    """
+    Build an inner-product index over L2-normalized embeddings, training it
+    first when the index type needs it.
+    """
+    import faiss
+    n, d = embeddings.shape
+    index_type = resolve_index_type(n, index_type)
 
+    if index_type == "ivf":
+        nlist = ivf_nlist(n)
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+        # Training on a sample is as good as on everything and much faster
+        sample = embeddings
+        if n > nlist * 256:
+            rng = np.random.default_rng(0)
+            sample = embeddings[rng.choice(n, nlist * 256, replace=False)]
+        index.train(sample)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, Config.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+    else:
+        index = faiss.IndexFlatIP(d)
+
+    index.add(embeddings)
+    return configure_index(index)
+
+# Generate embedding
+def build_index(df):
+    import faiss
+    texts = course_texts(df)
+    batch_size = Config.EMBED_BATCH_SIZE
+
+    embeddings = np.vstack([
+        embed_batch(texts[i:i + batch_size])
+        for i in range(0, len(texts), batch_size)
+    ])
+    faiss.normalize_L2(embeddings)
 
+    return build_faiss_index(embeddings)
 
+def load_index(path=None, mmap=None):
+    """
+    Read the FAISS index. With mmap (default Config.INDEX_MMAP) the vector
+    codes stay in the file and are paged in on demand, read-only, from the
+    page cache all processes share; only small structures such as the HNSW
+    graph or IVF centroids are copied.
+    """
+    import faiss
+    path = path or Config.INDEX_PATH
+    mmap = Config.INDEX_MMAP if mmap is None else mmap
+    # A sharded build (see sharded_index.py) leaves a manifest instead
+    from sharded_index import load_sharded_index, shard_manifest_path
+    if os.path.exists(shard_manifest_path(path)):
+        return load_sharded_index(path, mmap)
+    if mmap:
+        return configure_index(faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY))
+    return configure_index(faiss.read_index(path))
@@ -1,12 +1,212 @@
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2 import extensions
 from config import Config
 
-def get_db():
-    conn = psycopg2.connect(
+
+class PoolTimeout(Exception):
+    pass
+
+
+def _connect():
+    return psycopg2.connect(
         host=Config.DB_HOST,
         database=Config.DB_NAME,
         user=Config.DB_USER,
         password=Config.DB_PASSWORD,
         port=Config.DB_PORT
         )
-    return conn
\ No newline at end of file
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+    Callers block up to `timeout` seconds when all `maxconn` connections are
+    checked out. Idle connections are pinged before reuse once they have been
+    idle longer than `health_check_interval` seconds.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=30, health_check_interval=30, connect=_connect):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("invalid pool size: min=%s max=%s" % (minconn, maxconn))
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle = []          # (conn, last_used) pairs, most recently used last
+        self._size = 0           # open connections, idle + checked out
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._health_check_failures = 0
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def getconn(self):
+        start = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    # reserve the slot before connecting outside the lock
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                waited = True
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout("no database connection available after %ss" % self.timeout)
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and not self._is_healthy(conn, last_used):
+                self._discard(conn)
+                with self._cond:
+                    self._health_check_failures += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._wait_total += elapsed
+            self._wait_max = max(self._wait_max, elapsed)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if not close and not conn.closed:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    close = True
+
+        with self._cond:
+            if close or conn.closed or self._closed:
+                self._size -= 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _is_healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            # putconn rolls back an unfinished transaction and discards the
+            # connection if that fails, without masking the caller's error
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_total_ms": round(self._wait_total * 1000, 3),
+                "wait_time_avg_ms": round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_max * 1000, 3),
+                "health_check_failures": self._health_check_failures,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    Config.DB_POOL_MIN,
+                    Config.DB_POOL_MAX,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    health_check_interval=Config.DB_POOL_HEALTH_CHECK_INTERVAL,
+                )
+    return _pool
+
+
+def get_db():
+    """
+    Borrow a pooled connection:
+
+        with get_db() as conn:
+            ...
+
+    The connection is rolled back if the block raises and is returned to the
+    pool afterwards, so callers must commit their own writes.
+    """
+    return get_pool().connection()
+
+
+def get_pool_stats():
+    if _pool is None:
+        return {"initialized": False}
+    return dict(get_pool().stats(), initialized=True)
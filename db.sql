@@ -25,3 +25,43 @@ CREATE TABLE public.user_profile (
 	CONSTRAINT user_profile_pk PRIMARY KEY (id),
 	CONSTRAINT user_profile_unique UNIQUE (user_id)
 );
+
+
+CREATE TABLE public.goal_roadmap_cache (
+	goal_key varchar NOT NULL,
+	prompt_version varchar NOT NULL,
+	model varchar NOT NULL,
+	goal varchar NULL,
+	roadmap jsonb NOT NULL,
+	created_at timestamptz DEFAULT now() NOT NULL,
+	CONSTRAINT goal_roadmap_cache_pk PRIMARY KEY (goal_key, prompt_version, model)
+);
+
+
+CREATE TABLE public.goal_jobs (
+	goal_id int4 NOT NULL,
+	status varchar NOT NULL,
+	error text NULL,
+	created_at timestamptz DEFAULT now() NOT NULL,
+	updated_at timestamptz DEFAULT now() NOT NULL,
+	CONSTRAINT goal_jobs_pk PRIMARY KEY (goal_id)
+);
+
+
+CREATE TABLE public.mcq_bank (
+	id int4 GENERATED ALWAYS AS IDENTITY NOT NULL,
+	skill_key varchar NOT NULL,
+	skill varchar NOT NULL,
+	difficulty varchar NOT NULL,
+	question text NOT NULL,
+	question_hash varchar(64) NOT NULL,
+	options jsonb NOT NULL,
+	correct_answer varchar(1) NOT NULL,
+	explanation text NULL,
+	model varchar NULL,
+	created_at timestamptz DEFAULT now() NOT NULL,
+	CONSTRAINT mcq_bank_pk PRIMARY KEY (id),
+	CONSTRAINT mcq_bank_unique UNIQUE (skill_key, question_hash),
+	CONSTRAINT mcq_bank_difficulty_check CHECK (difficulty IN ('easy', 'medium', 'hard'))
+);
+CREATE INDEX mcq_bank_skill_difficulty_idx ON public.mcq_bank (skill_key, difficulty);
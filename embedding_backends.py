@@ -0,0 +1,113 @@
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+from config import Config
+from llm import get_openai_client
+
+
+class EmbeddingBackend(ABC):
+    """
+    Turns texts into float32 vectors. `model_name` identifies the vector
+    space: it is part of every embedding cache key, and an index built with
+    one backend can only be searched with vectors from the same one.
+    """
+    model_name = None
+
+    @abstractmethod
+    def embed_batch(self, texts):
+        """Embed `texts`, returning a float32 array of shape (len(texts), dim)."""
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+
+    def __init__(self, model):
+        self.model_name = model
+
+    def embed_batch(self, texts):
+        res = get_openai_client().embeddings.create(
+            model=self.model_name,
+            input=list(texts)
+        )
+        rows = sorted(res.data, key=lambda d: d.index)
+        return np.array([d.embedding for d in rows], dtype="float32")
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Local, dependency-free embeddings: character n-grams of the lowercased
+    text are hashed into `dim` signed buckets, counts are log-scaled and the
+    vector is L2-normalized. Needs no network and no fitted vocabulary, so it
+    works in CI and air-gapped environments. Quality is lexical only, so
+    treat it as a baseline, not a replacement for a semantic model.
+    """
+
+    _PRIME = np.uint64(1099511628211)
+    _OFFSET = np.uint64(14695981039346656037)
+    _MIX = np.uint64(0xff51afd7ed558ccd)
+
+    def __init__(self, dim=1024, ngram_min=3, ngram_max=5):
+        self.dim = dim
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self.model_name = f"hashing-char{ngram_min}-{ngram_max}-d{dim}"
+
+    def _hash_ngrams(self, data, n):
+        # FNV-1a over every window of n bytes at once, then a final mix so
+        # the low bits used for the bucket are well distributed
+        count = len(data) - n + 1
+        h = np.full(count, self._OFFSET, dtype=np.uint64)
+        for j in range(n):
+            h = (h ^ data[j:j + count]) * self._PRIME
+        h ^= h >> np.uint64(33)
+        h *= self._MIX
+        h ^= h >> np.uint64(33)
+        return h
+
+    def _embed_one(self, text):
+        normalized = " " + " ".join(str(text).lower().split()) + " "
+        data = np.frombuffer(normalized.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        vec = np.zeros(self.dim, dtype=np.float64)
+        for n in range(self.ngram_min, self.ngram_max + 1):
+            if len(data) < n:
+                break
+            h = self._hash_ngrams(data, n)
+            buckets = (h % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where(h >> np.uint64(63), -1.0, 1.0)
+            vec += np.bincount(buckets, weights=signs, minlength=self.dim)
+        vec = np.sign(vec) * np.log1p(np.abs(vec))
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec /= norm
+        return vec.astype("float32")
+
+    def embed_batch(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype="float32")
+        return np.vstack([self._embed_one(t) for t in texts])
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name):
+    if name == "openai":
+        return OpenAIEmbeddingBackend(Config.EMBEDDING_MODEL)
+    if name == "hashing":
+        return HashingEmbeddingBackend(
+            dim=Config.HASHING_EMBEDDING_DIM,
+            ngram_min=Config.HASHING_NGRAM_MIN,
+            ngram_max=Config.HASHING_NGRAM_MAX,
+        )
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {name!r} (expected 'openai' or 'hashing')")
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(Config.EMBEDDING_BACKEND)
+    return _backend
@@ -0,0 +1,101 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# SQLite caps the number of bound parameters per statement
+_CHUNK = 500
+
+
+def embedding_key(model, text):
+    # Content address of an embedding: same model + same text -> same vector
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent embedding vectors keyed by embedding_key().
+    Backed by a single SQLite file so builds can write batches as they finish
+    and a later build only has to embed texts it has never seen.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def _select(self, columns, keys):
+        rows = []
+        keys = list(keys)
+        with self._lock:
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i:i + _CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT {columns} FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+        return rows
+
+    def contains_many(self, keys):
+        return {row[0] for row in self._select("key", keys)}
+
+    def get_many(self, keys, max_age=None):
+        # max_age (seconds) skips vectors stored longer ago than that
+        oldest = time.time() - max_age if max_age else 0
+        return {
+            key: np.frombuffer(blob, dtype="float32")
+            for key, blob, created_at in self._select("key, vector, created_at", keys)
+            if created_at >= oldest
+        }
+
+    def get_matrix(self, keys):
+        # Rows in the order of `keys`; every key must be present
+        found = self.get_many(set(keys))
+        missing = [k for k in keys if k not in found]
+        if missing:
+            raise KeyError(f"{len(missing)} embeddings missing from store, e.g. {missing[0]}")
+        return np.vstack([found[k] for k in keys]).astype("float32")
+
+    def put_many(self, keys, vectors):
+        now = time.time()
+        rows = [
+            (key, np.asarray(vec, dtype="float32").tobytes(), now)
+            for key, vec in zip(keys, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def prune(self, keep_keys):
+        # Drop every vector whose key is not in keep_keys
+        keep_keys = set(keep_keys)
+        with self._lock:
+            stored = [row[0] for row in self._conn.execute("SELECT key FROM embeddings")]
+            stale = [k for k in stored if k not in keep_keys]
+            for i in range(0, len(stale), _CHUNK):
+                chunk = stale[i:i + _CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM embeddings WHERE key IN ({placeholders})", chunk)
+            self._conn.commit()
+        return len(stale)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
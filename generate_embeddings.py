@@ -1,18 +1,323 @@
 # generate_embeddings.py
+#
+# Builds embeddings.npy, index.faiss and the binary catalog (catalog_store.py)
+# from the catalog CSV.
+# Rows are streamed from the CSV in batches, each batch is embedded with one
+# API request and up to --concurrency requests run at once.
+#
+# Every vector is kept in a content-addressed store (embedding_store.py), so a
+# rebuild only embeds rows whose text is new or changed, and an interrupted
+# build resumes where it stopped. When the previous index and its row keys
+# are on disk, the index is updated in place instead of being rebuilt:
+# only changed, added and deleted rows are touched (HNSW can only take
+# appends and is rebuilt for anything else).
+# The index type (flat, IVF or HNSW) follows Config.INDEX_TYPE; "auto" picks
+# one from the catalog size.
+#
+# With ARTIFACTS_DIR set, the build starts from the published version and is
+# written to a new version directory (the *-out flags are ignored), which is
+# published when complete; running servers swap to it on reload.
+#
+#   python generate_embeddings.py --csv Coursera.csv --batch-size 100 --concurrency 4
+import argparse
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import numpy as np
+import pandas as pd
 import faiss
-from database import embed, load_data
+from config import Config
+import artifacts
+from catalog_store import write_catalog
+from sharded_index import shard_manifest_path, write_sharded_index
+from database import (build_faiss_index, configure_index, course_texts, embed_batch, embedding_model,
+                      index_type_of, load_data, resolve_index_type)
+from embedding_store import EmbeddingStore, embedding_key
+
+
+def iter_batches(csv_path, batch_size):
+    # Yields lists of row texts without loading the whole CSV
+    for chunk in pd.read_csv(csv_path, chunksize=batch_size):
+        chunk = chunk.fillna("")
+        yield course_texts(chunk)
+
+
+def embed_with_retry(texts, max_retries):
+    for attempt in range(max_retries + 1):
+        try:
+            return embed_batch(texts)
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = min(2 ** attempt, 30)
+            print(f"Embedding request failed ({e}), retrying in {delay}s")
+            time.sleep(delay)
+
+
+def build_embeddings(csv_path, store, batch_size, concurrency, max_retries):
+    """
+    Make sure every catalog row has a vector in `store`.
+    Returns the row keys in CSV order.
+    """
+    model = embedding_model()
+
+    started = time.perf_counter()
+    row_keys = []
+    queued = set()
+    buffer = []
+    embedded_rows = 0
+    pending = {}
+
+    def report(futures):
+        nonlocal embedded_rows
+        for future in futures:
+            keys = pending.pop(future)
+            store.put_many(keys, future.result())
+            embedded_rows += len(keys)
+        elapsed = time.perf_counter() - started
+        print(f"{embedded_rows} rows embedded, {embedded_rows / elapsed:.1f} rows/s")
+
+    def submit(items):
+        # Keep at most `concurrency` requests in flight so the CSV is only
+        # read as fast as batches are embedded
+        if len(pending) >= concurrency:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            report(done)
+        keys = [k for k, _ in items]
+        future = pool.submit(embed_with_retry, [t for _, t in items], max_retries)
+        pending[future] = keys
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for texts in iter_batches(csv_path, batch_size):
+            keys = [embedding_key(model, t) for t in texts]
+            row_keys.extend(keys)
+            stored = store.contains_many(keys)
+            for key, text in zip(keys, texts):
+                if key in stored or key in queued:
+                    continue
+                queued.add(key)
+                buffer.append((key, text))
+                if len(buffer) == batch_size:
+                    submit(buffer)
+                    buffer = []
+        if buffer:
+            submit(buffer)
+        if pending:
+            report(wait(pending).done)
+
+    print(f"{len(row_keys)} rows, {len(row_keys) - embedded_rows} reused from the embedding store")
+    return row_keys
+
+
+def diff_keys(old_keys, new_keys):
+    """
+    Match the previous build's rows to this one's by key. Returns
+    (moved, added): moved[i] is the new row of old row i, or -1 when it was
+    changed or deleted, and added lists the new rows that need a vector.
+    Rows are matched in order, so an edit anywhere in the catalog costs one
+    removal and one addition.
+    """
+    positions = defaultdict(deque)
+    for j, key in enumerate(new_keys):
+        positions[key].append(j)
+    old_rows, new_rows = [], []
+    for i, key in enumerate(old_keys):
+        if positions.get(key):
+            old_rows.append(i)
+            new_rows.append(positions[key].popleft())
+    old_rows, new_rows = np.array(old_rows, dtype="int64"), np.array(new_rows, dtype="int64")
+    # Reordered rows: keep the longest run that is still in order
+    if np.any(np.diff(new_rows) < 0):
+        keep = _increasing(new_rows)
+        old_rows, new_rows = old_rows[keep], new_rows[keep]
+
+    moved = np.full(len(old_keys), -1, dtype="int64")
+    moved[old_rows] = new_rows
+    added = np.ones(len(new_keys), dtype=bool)
+    added[new_rows] = False
+    return moved, np.flatnonzero(added)
+
+
+def _increasing(values):
+    # Positions of a longest strictly increasing subsequence of `values`
+    tails, tail_at, previous = [], [], [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_at.append(i)
+        else:
+            tails[k] = value
+            tail_at[k] = i
+        previous[i] = tail_at[k - 1] if k else -1
+    keep, i = [], tail_at[-1] if tail_at else -1
+    while i >= 0:
+        keep.append(i)
+        i = previous[i]
+    return np.array(keep[::-1], dtype="int64")
+
+
+def _apply_changes(index, index_type, moved, added, embeddings):
+    """
+    Bring `index` from the previous row order to the new one, touching only
+    the changed rows; index ids stay equal to catalog rows. Returns False
+    when the index type cannot take the change and needs a rebuild.
+    """
+    kept = np.flatnonzero(moved >= 0)
+    removed = np.flatnonzero(moved < 0)
+
+    if index_type == "ivf":
+        # IVF keeps explicit ids: drop the old rows, renumber the survivors
+        # in the inverted lists and add the new rows under their row ids
+        ivf = faiss.extract_index_ivf(index)
+        if ivf.direct_map.type != faiss.DirectMap.NoMap:
+            return False
+        if len(removed):
+            index.remove_ids(removed)
+        if not np.array_equal(moved[kept], kept):
+            for i in range(ivf.nlist):
+                size = ivf.invlists.list_size(i)
+                if size:
+                    ids = faiss.rev_swig_ptr(ivf.invlists.get_ids(i), size)
+                    ids[:] = moved[ids]
+        if len(added):
+            index.add_with_ids(embeddings[added], added)
+        return True
+
+    if np.array_equal(moved[kept], kept):
+        # Every surviving row is where it was: changed rows are overwritten
+        # in place, deleted rows can only be at the end
+        if index_type == "hnsw" and len(removed):
+            return False
+        changed = added[added < index.ntotal]
+        if len(changed):
+            vectors = faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+            vectors[changed] = embeddings[changed]
+        if len(removed):
+            index.remove_ids(removed[removed >= len(embeddings)])
+    elif index_type == "flat" and np.array_equal(moved[kept], np.arange(len(kept))):
+        # Rows deleted from the middle; a flat index closes the gaps itself
+        index.remove_ids(removed)
+    else:
+        return False
+    if index.ntotal < len(embeddings):
+        index.add(embeddings[index.ntotal:])
+    return True
+
+
+def update_index(index_path, keys_path, row_keys, embeddings, index_type=None):
+    # index_path/keys_path are the previous build's, None to rebuild
+    index_type = resolve_index_type(len(row_keys), index_type)
+    if index_path and keys_path and os.path.exists(index_path) and os.path.exists(keys_path):
+        index = configure_index(faiss.read_index(index_path))
+        with open(keys_path) as f:
+            old_keys = json.load(f)
+        if (index.ntotal == len(old_keys) and index.d == embeddings.shape[1]
+                and index_type_of(index) == index_type):
+            moved, added = diff_keys(old_keys, row_keys)
+            if _apply_changes(index, index_type, moved, added, embeddings):
+                print(f"Index updated: {int((moved < 0).sum())} rows removed, {len(added)} rows added")
+                return index
+
+    index = build_faiss_index(embeddings, index_type)
+    print(f"Index rebuilt as {index_type} with {index.ntotal} rows")
+    return index
+
+
+def _replace_file(path, write):
+    # Write next to the target and rename over it, so a server that has the
+    # old file memory-mapped keeps its pages and never sees a partial file
+    tmp = f"{path}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _save_npy(path, array):
+    # Through a file object so np.save does not append ".npy" to the name
+    with open(path, "wb") as f:
+        np.save(f, array)
+
+
+def _save_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the course catalog and build the FAISS index")
+    parser.add_argument("--csv", default=Config.DATASET_PATH)
+    parser.add_argument("--batch-size", type=int, default=Config.EMBED_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=Config.EMBED_CONCURRENCY)
+    parser.add_argument("--max-retries", type=int, default=Config.EMBED_MAX_RETRIES)
+    parser.add_argument("--store", default=Config.EMBEDDING_STORE_PATH)
+    parser.add_argument("--embeddings-out", default=Config.EMBEDDINGS_PATH)
+    parser.add_argument("--index-out", default=Config.INDEX_PATH)
+    parser.add_argument("--keys-out", default=Config.INDEX_KEYS_PATH)
+    parser.add_argument("--catalog-out", default=Config.CATALOG_PATH)
+    parser.add_argument("--index-type", default=Config.INDEX_TYPE, choices=["auto", "flat", "ivf", "hnsw"])
+    parser.add_argument("--shards", type=int, default=Config.INDEX_SHARDS,
+                        help="split the index into this many row-range shards (always a full build)")
+    parser.add_argument("--full", action="store_true", help="rebuild the index instead of updating it")
+    parser.add_argument("--prune", action="store_true", help="drop stored vectors no longer in the catalog")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = EmbeddingStore(args.store)
+    row_keys = build_embeddings(args.csv, store, args.batch_size, args.concurrency, args.max_retries)
+
+    if artifacts.enabled():
+        previous = artifacts.artifact_paths() if artifacts.current_version() else None
+        version, _ = artifacts.new_version()
+        out = artifacts.artifact_paths(version)
+    else:
+        version = None
+        out = previous = {"index": args.index_out, "keys": args.keys_out,
+                          "embeddings": args.embeddings_out, "catalog": args.catalog_out}
+    if args.full:
+        previous = None
+
+    embeddings = store.get_matrix(row_keys)
+    faiss.normalize_L2(embeddings)
+    _replace_file(out["embeddings"], lambda tmp: _save_npy(tmp, embeddings))
+
+    if args.shards > 1:
+        sharded = write_sharded_index(embeddings, out["index"], args.shards, args.index_type)
+        index_type, shards = sharded["index_type"], len(sharded["shards"])
+        print(f"Index built as {shards} {index_type} shards with {len(row_keys)} rows")
+    else:
+        index = update_index(previous and previous["index"], previous and previous["keys"],
+                             row_keys, embeddings, args.index_type)
+        _replace_file(out["index"], lambda tmp: faiss.write_index(index, tmp))
+        # An unsharded index replaces any earlier sharded layout
+        if os.path.exists(shard_manifest_path(out["index"])):
+            os.remove(shard_manifest_path(out["index"]))
+        index_type, shards = index_type_of(index), 1
+    _replace_file(out["keys"], lambda tmp: _save_json(tmp, row_keys))
+    # Same CSV, same row order as the index rows just written
+    write_catalog(load_data(args.csv), out["catalog"], row_keys, source=os.path.basename(args.csv))
+
+    if version is not None:
+        artifacts.publish(version, {
+            "rows": len(row_keys),
+            "dim": int(embeddings.shape[1]),
+            "index_type": index_type,
+            "shards": shards,
+            "embedding_model": embedding_model(),
+            "source": os.path.basename(args.csv),
+        })
+        print(f"Published artifact version {version}")
 
-df = load_data()
-course_texts = (df['Course Name'] + " " + df['Course Description'] + " " + df['Skills']).tolist()
+    if args.prune:
+        print(f"Pruned {store.prune(row_keys)} stale vectors from the embedding store")
+    store.close()
 
-# Generate embeddings once
-embeddings = np.array([embed(t) for t in course_texts], dtype="float32")
-faiss.normalize_L2(embeddings)
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {len(row_keys)} rows in {elapsed:.1f}s ({len(row_keys) / elapsed:.1f} rows/s)")
 
-np.save("embeddings.npy", embeddings)
 
-# Build FAISS and save
-index = faiss.IndexFlatIP(embeddings.shape[1])
-index.add(embeddings)
-faiss.write_index(index, "index.faiss")
+if __name__ == "__main__":
+    main()
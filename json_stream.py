@@ -0,0 +1,91 @@
+import json
+import re
+
+
+def _loads_lenient(text):
+    # Same repairs as _clean_and_parse_json: raw newlines inside strings and
+    # trailing commas before a closing brace/bracket
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        return json.loads(re.sub(r",\s*([}\]])", r"\1", text), strict=False)
+
+
+class JsonArrayItemStream:
+    """
+    Incremental parser for model output that is being streamed token by
+    token. feed() returns every object that has been completed as an item
+    of a JSON array, together with the keys of the objects around that
+    array, e.g.
+
+        [{"question": ...}, ...]          -> ([], {...}) per question
+        {"Python": [{"question": ...}]}   -> (["Python"], {...}) per question
+
+    Only the outermost array items are returned; objects nested inside an
+    item come back as part of it. Text outside the JSON (code fences,
+    commentary) is ignored.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._stack = []        # open containers: [char, key_of_last_member, expecting_key]
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._item_start = None     # offset of the array item being collected
+        self._item_depth = None
+        self.failed = 0
+
+    def feed(self, text):
+        self._buf += text
+        items = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    top = self._stack[-1] if self._stack else None
+                    if top is not None and top[0] == "{" and top[2]:
+                        top[1] = buf[self._string_start + 1:i]
+                        top[2] = False
+            elif ch == '"' and self._stack:
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if (ch == "{" and self._item_start is None
+                        and self._stack and self._stack[-1][0] == "["):
+                    self._item_start = i
+                    self._item_depth = len(self._stack)
+                self._stack.append([ch, None, ch == "{"])
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if ch == "}" and self._item_start is not None and len(self._stack) == self._item_depth:
+                    path = [c[1] for c in self._stack if c[0] == "{"]
+                    try:
+                        items.append((path, _loads_lenient(buf[self._item_start:i + 1])))
+                    except json.JSONDecodeError as e:
+                        self.failed += 1
+                        print("Skipping unparsable streamed item:", e)
+                    self._item_start = None
+            elif ch == "," and self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][2] = True
+            i += 1
+
+        # Drop text that can no longer be part of an item
+        keep_from = i if self._item_start is None else self._item_start
+        if self._in_string and self._string_start is not None:
+            keep_from = min(keep_from, self._string_start)
+        self._buf = buf[keep_from:]
+        self._pos = i - keep_from
+        if self._item_start is not None:
+            self._item_start -= keep_from
+        if self._string_start is not None:
+            self._string_start -= keep_from
+        return items
@@ -0,0 +1,160 @@
+import threading
+
+from config import Config
+
+# openai and httpx take longer to import than the rest of the app put
+# together, so they are imported when the first client is created
+
+DEFAULT_SYSTEM_PROMPT = "You are an assistant that returns only valid JSON in the format described to the user."
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """
+    The process-wide OpenAI client. It is created on first use and shared by
+    every thread, so its HTTP connection pool (and the TLS sessions in it)
+    is reused across requests instead of being rebuilt per call.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from openai import OpenAI
+                timeout = httpx.Timeout(Config.LLM_TIMEOUT, connect=Config.LLM_CONNECT_TIMEOUT)
+                http_client = httpx.Client(timeout=timeout, limits=_http_limits())
+                _client = OpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    timeout=timeout,
+                    max_retries=Config.LLM_MAX_RETRIES,
+                    http_client=http_client,
+                )
+    return _client
+
+
+def _http_limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=Config.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=Config.LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_async_openai_client():
+    """
+    AsyncOpenAI counterpart of get_openai_client for the ASGI app. It uses
+    the same timeouts and connection limits; create it from within the
+    event loop that will use it.
+    """
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                import httpx
+                from openai import AsyncOpenAI
+                timeout = httpx.Timeout(Config.LLM_TIMEOUT, connect=Config.LLM_CONNECT_TIMEOUT)
+                _async_client = AsyncOpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    timeout=timeout,
+                    max_retries=Config.LLM_MAX_RETRIES,
+                    http_client=httpx.AsyncClient(timeout=timeout, limits=_http_limits()),
+                )
+    return _async_client
+
+
+def _messages(prompt, system):
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _message_content(resp):
+    # The new OpenAI client returns an object with attributes, not a subscriptable dict.
+    # Try attribute access first, then fall back to dict conversion.
+    try:
+        return resp.choices[0].message.content
+    except Exception:
+        try:
+            resp_dict = resp.to_dict()
+            return resp_dict["choices"][0]["message"]["content"]
+        except Exception:
+            # Fallback: stringify the whole response for debugging
+            return str(resp)
+
+
+def chat_completion(prompt, system=DEFAULT_SYSTEM_PROMPT, model=None, temperature=0.2, max_tokens=1200, **kwargs):
+    """
+    Gateway for every chat completion the app makes. Sends `prompt` as the
+    user message and returns the text of the first choice.
+    """
+    resp = get_openai_client().chat.completions.create(
+        model=model or Config.OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **kwargs
+    )
+    return _message_content(resp)
+
+
+def stream_chat_completion(prompt, system=DEFAULT_SYSTEM_PROMPT, model=None, temperature=0.2, max_tokens=1200, **kwargs):
+    """
+    Streaming variant of chat_completion: yields the text of the first
+    choice piece by piece as the model produces it.
+    """
+    stream = get_openai_client().chat.completions.create(
+        model=model or Config.OPENAI_MODEL,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        **kwargs
+    )
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # Stop the HTTP response if the consumer goes away mid-stream
+        stream.close()
+
+
+async def async_chat_completion(prompt, system=DEFAULT_SYSTEM_PROMPT, model=None, temperature=0.2, max_tokens=1200, **kwargs):
+    """Awaitable chat_completion for the async service layer."""
+    resp = await get_async_openai_client().chat.completions.create(
+        model=model or Config.OPENAI_MODEL,
+        messages=_messages(prompt, system),
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **kwargs
+    )
+    return _message_content(resp)
+
+
+async def async_stream_chat_completion(prompt, system=DEFAULT_SYSTEM_PROMPT, model=None, temperature=0.2, max_tokens=1200, **kwargs):
+    """Async generator counterpart of stream_chat_completion."""
+    stream = await get_async_openai_client().chat.completions.create(
+        model=model or Config.OPENAI_MODEL,
+        messages=_messages(prompt, system),
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        **kwargs
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
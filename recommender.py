@@ -1,24 +1,232 @@
-import faiss
-from database import load_data,  embed, load_index
+import threading
+import time
+from collections import deque
+
+import artifacts
+from catalog_filters import CatalogFilters, filtered_search
+from config import Config
+from database import load_catalog, embed_queries, embedding_model, load_index
+from sharded_index import ShardedIndex
 import numpy as np
 
-df = load_data()
-index = load_index()
-def recommend_courses(query: str, top_k: int = 5):
-    print(query)
-    # Embed search query
-    query_vector = embed(query).reshape(1, -1)
-    faiss.normalize_L2(query_vector)
-
-    scores, indices = index.search(query_vector, top_k)
-    results = []
-
-    for i in indices[0]:
-        course = df.iloc[i]
-        results.append({
-            "Course Name": course['Course Name'],
-            "Course Description": course['Course Description'],
-            "Skills": course['Skills']
-        })
-    print(results)
-    return results
\ No newline at end of file
+RESULT_COLUMNS = ("Course Name", "Course Description", "Skills")
+CATALOG_COLUMNS = (
+    "Course Name", "University", "Difficulty Level", "Course Rating",
+    "Course URL", "Course Description", "Skills",
+)
+
+class LoadedCatalog:
+    """The catalog columns, FAISS index and filter bitmaps searched together."""
+
+    def __init__(self, catalog, index, version=None):
+        for name, column in catalog.items():
+            if len(column) != index.ntotal:
+                raise ValueError(
+                    f"Catalog column {name!r} has {len(column)} rows but the index has {index.ntotal}; "
+                    "rebuild them together with generate_embeddings.py"
+                )
+        self.catalog = catalog
+        self.index = index
+        self.filters = CatalogFilters(self.catalog, index.ntotal)
+        self.version = version
+        self.loaded_at = time.time()
+
+# Nothing is read at import time: the first search (or warm_up) loads the
+# catalog, so importing the app stays fast and forked workers only touch
+# what they use.
+#
+# _loaded is an immutable snapshot. Searches read the reference once and
+# use that snapshot to the end, so reload() can build the next one on the
+# side and swap it in with a single assignment; the search path takes no
+# lock, and requests already running finish on the snapshot they started with.
+_loaded = None
+_load_lock = threading.Lock()
+# Recent query vectors, replayed against a new snapshot before the swap
+_recent_queries = deque(maxlen=Config.RELOAD_WARM_QUERIES)
+_watcher = None
+
+def load_snapshot(version=None):
+    """
+    Read one artifact version (the published one by default, or the flat
+    INDEX_PATH/CATALOG_PATH files without ARTIFACTS_DIR) into a LoadedCatalog.
+    """
+    if artifacts.enabled():
+        version = version or artifacts.current_version()
+    paths = artifacts.artifact_paths(version)
+    return LoadedCatalog(load_catalog(paths["catalog"], keys_path=paths["keys"]), load_index(paths["index"]), version)
+
+def get_catalog():
+    global _loaded
+    if _loaded is None:
+        with _load_lock:
+            if _loaded is None:
+                started = time.perf_counter()
+                _loaded = load_snapshot()
+                mode = "memory-mapped" if Config.INDEX_MMAP else "in memory"
+                version = f" (version {_loaded.version})" if _loaded.version else ""
+                print(f"Recommender loaded {_loaded.index.ntotal} rows {mode}{version} in {time.perf_counter() - started:.2f}s")
+    return _loaded
+
+def _warm(loaded):
+    # Search with recent queries (or a zero vector) and gather the hits, so
+    # the index and catalog pages they touch are resident before traffic
+    recent = [v for v in _recent_queries.copy() if len(v) == loaded.index.d]
+    queries = np.vstack(recent) if recent else np.zeros((1, loaded.index.d), dtype="float32")
+    _, indices = loaded.index.search(queries, 10)
+    ids = np.unique(indices[indices >= 0])
+    for column in loaded.catalog.values():
+        column[ids]
+
+def warm_up():
+    """
+    Load the catalog now instead of on the first request, and run a search
+    so the pages it needs are faulted in before traffic arrives.
+    """
+    loaded = get_catalog()
+    _warm(loaded)
+    return loaded
+
+def reload(force=False):
+    """
+    Load the published artifact version into a new snapshot, warm it and
+    swap it in. Without `force` nothing happens when that version is already
+    being served. Raises, and keeps serving the current snapshot, when the
+    new version cannot be loaded.
+    """
+    global _loaded
+    with _load_lock:
+        previous = _loaded
+        version = artifacts.current_version() if artifacts.enabled() else None
+        if not force and previous is not None and version is not None and version == previous.version:
+            return {"reloaded": False, "version": version}
+
+        started = time.perf_counter()
+        loaded = load_snapshot(version)
+        _warm(loaded)
+        _loaded = loaded
+        elapsed = time.perf_counter() - started
+    print(f"Recommender swapped to {loaded.version or 'the files on disk'} ({loaded.index.ntotal} rows) in {elapsed:.2f}s")
+    return {
+        "reloaded": True,
+        "version": loaded.version,
+        "previous_version": previous.version if previous is not None else None,
+        "rows": loaded.index.ntotal,
+        "seconds": round(elapsed, 3),
+    }
+
+def snapshot_info():
+    loaded = _loaded
+    return {
+        "loaded": loaded is not None,
+        "version": loaded.version if loaded is not None else None,
+        "rows": loaded.index.ntotal if loaded is not None else None,
+        "loaded_at": loaded.loaded_at if loaded is not None else None,
+        "published_version": artifacts.current_version() if artifacts.enabled() else None,
+    }
+
+def start_reload_watcher(interval=None):
+    """
+    Poll ARTIFACTS_DIR/CURRENT every `interval` seconds (default
+    RELOAD_POLL_INTERVAL) and reload when a new version is published. Every
+    worker process runs its own, so all of them pick the version up.
+    """
+    global _watcher
+    interval = interval or Config.RELOAD_POLL_INTERVAL
+    if _watcher is not None or not interval or not artifacts.enabled():
+        return _watcher
+
+    def watch():
+        failed = None
+        while True:
+            time.sleep(interval)
+            loaded = _loaded
+            version = artifacts.current_version()
+            # Not loaded yet: the first search reads the current version anyway
+            if loaded is None or version is None or version in (loaded.version, failed):
+                continue
+            try:
+                reload()
+                failed = None
+            except Exception as e:
+                failed = version
+                print(f"Reload of artifact version {version} failed, still serving {loaded.version}: {e}")
+
+    _watcher = threading.Thread(target=watch, name="artifact-reload", daemon=True)
+    _watcher.start()
+    return _watcher
+
+def get_catalog_filters():
+    return get_catalog().filters
+
+def _search(loaded, queries, top_k, filters=None):
+    index = loaded.index
+    # Filters become an ID selector applied inside the search itself
+    bitmap = loaded.filters.bitmap(filters)
+    selected = index.ntotal
+    if bitmap is not None:
+        selected = CatalogFilters.count(bitmap)
+        if selected == 0:
+            return np.zeros((len(queries), 0), dtype="float32"), np.zeros((len(queries), 0), dtype="int64")
+
+    # Embed all queries at once and run a single matrix search
+    query_vectors = np.array(embed_queries(queries), dtype="float32").reshape(len(queries), -1)
+    if query_vectors.shape[1] != index.d:
+        raise ValueError(
+            f"{embedding_model()} produces {query_vectors.shape[1]}-dim vectors but the index has {index.d}; "
+            "rebuild it with generate_embeddings.py"
+        )
+    norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    query_vectors /= np.where(norms > 0, norms, 1)
+    _recent_queries.extend(query_vectors)
+    top_k = max(1, min(int(top_k), Config.RECOMMEND_TOP_K_MAX, selected))
+    if bitmap is not None:
+        if isinstance(index, ShardedIndex):
+            return index.search(query_vectors, top_k, bitmap)
+        return filtered_search(index, query_vectors, top_k, bitmap, selected)
+    return index.search(query_vectors, top_k)
+
+def _courses(catalog, scores, indices, min_score=None, names=RESULT_COLUMNS):
+    # FAISS pads with -1 when it finds fewer than top_k hits
+    keep = indices >= 0
+    if min_score is not None:
+        keep &= scores >= min_score
+    ids = indices[keep]
+    columns = [catalog[name][ids] for name in names]
+    return [
+        dict(zip(names, values), score=score)
+        for *values, score in zip(*columns, scores[keep].tolist())
+    ]
+
+def recommend_courses(query: str, top_k: int = 5, min_score=None, filters=None):
+    """
+    Top courses for `query`. `filters` restricts the search to matching
+    rows, e.g. {"difficulty": "Beginner", "min_rating": 4.5,
+    "university": ["Stanford University", "Yale University"]}.
+    """
+    loaded = get_catalog()
+    scores, indices = _search(loaded, [query], top_k, filters)
+    return _courses(loaded.catalog, scores[0], indices[0], min_score)
+
+def recommend_courses_batch(queries, top_k: int = 5, min_score=None, filters=None):
+    """
+    Recommendations for several queries with one embedding call and one
+    index.search. Returns one {"query", "results"} entry per query, in order.
+    """
+    if not queries:
+        return []
+    loaded = get_catalog()
+    scores, indices = _search(loaded, queries, top_k, filters)
+    return [
+        {"query": query, "results": _courses(loaded.catalog, row_scores, row_indices, min_score)}
+        for query, row_scores, row_indices in zip(queries, scores, indices)
+    ]
+
+def catalog_candidates(query: str, top_k: int, filters=None):
+    """
+    Like recommend_courses, but each hit carries every catalog column
+    (URL, rating, university, ...) for callers that present full courses.
+    """
+    loaded = get_catalog()
+    scores, indices = _search(loaded, [query], top_k, filters)
+    names = [n for n in CATALOG_COLUMNS if n in loaded.catalog]
+    return _courses(loaded.catalog, scores[0], indices[0], names=names)
@@ -0,0 +1,46 @@
+from flask import Blueprint, jsonify, request
+from database import query_cache_stats
+from db import get_pool_stats
+from recommender import reload, snapshot_info
+from services.recommendation_service import invalidate_roadmap_cache, skill_cache_stats
+from services.user_service import profile_cache_stats
+
+admin_bp = Blueprint('admin_bp', __name__)
+
+@admin_bp.route('/db-pool', methods=['GET'])
+def db_pool_stats():
+    return jsonify({"data": get_pool_stats(), "success": True}), 200
+
+@admin_bp.route('/query-cache', methods=['GET'])
+def query_cache():
+    return jsonify({"data": query_cache_stats(), "success": True}), 200
+
+@admin_bp.route('/roadmap-cache', methods=['DELETE'])
+def clear_roadmap_cache():
+    # ?goal=... drops one goal, no parameter drops every cached roadmap
+    deleted = invalidate_roadmap_cache(request.args.get("goal"))
+    return jsonify({"data": {"deleted": deleted}, "success": True}), 200
+
+@admin_bp.route('/skill-cache', methods=['GET'])
+def skill_cache():
+    return jsonify({"data": skill_cache_stats(), "success": True}), 200
+
+@admin_bp.route('/profile-cache', methods=['GET'])
+def profile_cache():
+    return jsonify({"data": profile_cache_stats(), "success": True}), 200
+
+@admin_bp.route('/artifacts', methods=['GET'])
+def artifacts_info():
+    return jsonify({"data": snapshot_info(), "success": True}), 200
+
+@admin_bp.route('/reload', methods=['POST'])
+def reload_artifacts():
+    # Swaps this worker to the published index and catalog; with several
+    # workers use RELOAD_POLL_INTERVAL so every one of them picks it up.
+    # ?force=1 reloads even when the version has not changed.
+    force = request.args.get("force", "").lower() in ("1", "true", "yes")
+    try:
+        result = reload(force=force)
+    except Exception as e:
+        return jsonify({"data": snapshot_info(), "message": f"Reload failed: {e}", "success": False}), 500
+    return jsonify({"data": result, "success": True}), 200
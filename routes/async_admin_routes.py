@@ -0,0 +1,48 @@
+import asyncio
+
+from quart import Blueprint, jsonify, request
+from async_db import get_pool_stats
+from database import query_cache_stats
+from recommender import reload, snapshot_info
+from services.async_recommendation_service import invalidate_roadmap_cache
+from services.recommendation_service import skill_cache_stats
+from services.user_service import profile_cache_stats
+
+# Quart version of routes/admin_routes.py for the ASGI app
+async_admin_bp = Blueprint('async_admin_bp', __name__)
+
+@async_admin_bp.route('/db-pool', methods=['GET'])
+async def db_pool_stats():
+    return jsonify({"data": get_pool_stats(), "success": True}), 200
+
+@async_admin_bp.route('/query-cache', methods=['GET'])
+async def query_cache():
+    return jsonify({"data": query_cache_stats(), "success": True}), 200
+
+@async_admin_bp.route('/roadmap-cache', methods=['DELETE'])
+async def clear_roadmap_cache():
+    # ?goal=... drops one goal, no parameter drops every cached roadmap
+    deleted = await invalidate_roadmap_cache(request.args.get("goal"))
+    return jsonify({"data": {"deleted": deleted}, "success": True}), 200
+
+@async_admin_bp.route('/skill-cache', methods=['GET'])
+async def skill_cache():
+    return jsonify({"data": skill_cache_stats(), "success": True}), 200
+
+@async_admin_bp.route('/profile-cache', methods=['GET'])
+async def profile_cache():
+    return jsonify({"data": profile_cache_stats(), "success": True}), 200
+
+@async_admin_bp.route('/artifacts', methods=['GET'])
+async def artifacts_info():
+    return jsonify({"data": snapshot_info(), "success": True}), 200
+
+@async_admin_bp.route('/reload', methods=['POST'])
+async def reload_artifacts():
+    force = request.args.get("force", "").lower() in ("1", "true", "yes")
+    try:
+        # Loading and warming the new snapshot blocks, so keep it off the loop
+        result = await asyncio.to_thread(reload, force)
+    except Exception as e:
+        return jsonify({"data": snapshot_info(), "message": f"Reload failed: {e}", "success": False}), 500
+    return jsonify({"data": result, "success": True}), 200
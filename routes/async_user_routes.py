@@ -0,0 +1,46 @@
+from quart import Blueprint, jsonify, request
+from services.async_user_service import (get_profile, get_user_by_email, get_users, create_user, create_profile)
+
+# Quart version of routes/user_routes.py for the ASGI app
+async_user_bp = Blueprint('async_user_bp', __name__)
+
+@async_user_bp.route('/', methods=['GET'])
+async def fetch_users():
+    users = await get_users()
+    return jsonify(users), 200
+
+@async_user_bp.route('/login', methods=['POST'])
+async def fetch_user_by_email():
+    data = await request.get_json()
+    users = await get_user_by_email(data["email"])
+    return jsonify(users), 200
+
+@async_user_bp.route('/', methods=['POST'])
+async def create_user_data():
+    data = await request.get_json()
+    if data is None:
+        return jsonify({"error": "JSON body required"}), 400
+    user = await create_user(data)
+    if user:
+        return jsonify({"message":"User created successfully", "success":True}), 201
+    else:
+        return jsonify({"success":False}), 400
+
+@async_user_bp.route('/profile', methods=['POST'])
+async def create_user_profile():
+    data = await request.get_json()
+    if data is None:
+        return jsonify({"error": "JSON body required"}), 400
+    profile = await create_profile(data)
+    if profile:
+        return jsonify({"message":"User profile created successfully", "success":True}), 201
+    else:
+        return jsonify({"success":False}), 400
+
+@async_user_bp.route('/profile/<int:user_id>', methods=['GET'])
+async def get_user_profile(user_id):
+    profile = await get_profile(user_id)
+    if profile:
+        return jsonify({"data":profile, "success":True}), 200
+    else:
+        return jsonify({"success":False}), 400
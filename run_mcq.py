@@ -0,0 +1,309 @@
+"""
+Pre-generate the MCQ bank that POST /generate-mcq samples from when
+MCQ_SOURCE is "bank" or "auto".
+
+For every skill and difficulty the model is asked for questions in small
+batches until MCQ_BANK_PER_DIFFICULTY valid, distinct questions exist. Each
+question is validated before it is kept, and the bank is bulk-loaded into
+the mcq_bank table (see db.sql). Skills that already have enough questions
+in the table are topped up, not regenerated.
+
+    python run_mcq.py --skills "Python,SQL,Machine Learning"
+    python run_mcq.py --skills-file skills.txt --per-difficulty 50 --out bank.jsonl
+    python run_mcq.py --from-file bank.jsonl          # load without calling the model
+"""
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from psycopg2.extras import execute_values
+from config import Config
+from db import get_db
+from llm import chat_completion
+from services.recommendation_service import _clean_and_parse_json
+from services.user_service import MCQ_DIFFICULTIES, MCQ_SYSTEM_PROMPT, normalize_skill
+
+OPTION_KEYS = ("A", "B", "C", "D")
+
+
+def bank_prompt(skill, difficulty, num_questions, avoid=()):
+    avoid_text = ""
+    if avoid:
+        listed = "\n".join(f"- {q}" for q in list(avoid)[-30:])
+        avoid_text = f"\n        Do NOT repeat or rephrase any of these existing questions:\n{listed}\n"
+    return f"""
+        You are an expert assessment creator.
+
+        Generate EXACTLY {num_questions} {difficulty.upper()} multiple choice questions for the skill: "{skill}".
+
+        Difficulty guide:
+        - easy: core terminology and basic usage
+        - medium: applying the skill to realistic, scenario-based problems
+        - hard: edge cases, trade-offs and advanced problem solving
+
+        Every question must have exactly four options (A, B, C, D) and ONLY one correct answer.
+        Avoid ambiguous wording.
+{avoid_text}
+        Output Format (STRICT JSON ONLY — NO EXTRA TEXT):
+
+        [
+        {{
+            "question": "string",
+            "difficulty": "{difficulty}",
+            "options": {{
+                "A": "string",
+                "B": "string",
+                "C": "string",
+                "D": "string"
+            }},
+            "correct_answer": "A/B/C/D",
+            "explanation": "Brief explanation of why the answer is correct"
+        }}
+        ]
+        """
+
+
+def question_hash(question):
+    return hashlib.sha256(" ".join(question.lower().split()).encode("utf-8")).hexdigest()
+
+
+def validate_question(item, difficulty=None):
+    """
+    Returns a cleaned copy of a generated question, or None when it cannot be
+    served: missing text, not exactly four non-empty options, an answer that
+    is not one of them, or a difficulty other than the one requested.
+    """
+    if not isinstance(item, dict):
+        return None
+    question = str(item.get("question") or "").strip()
+    options = item.get("options")
+    if not question or not isinstance(options, dict):
+        return None
+    options = {str(k).strip().upper().rstrip(").:"): str(v).strip() for k, v in options.items()}
+    if sorted(options) != list(OPTION_KEYS) or not all(options.values()):
+        return None
+    if len(set(v.lower() for v in options.values())) != len(OPTION_KEYS):
+        return None
+    answer = str(item.get("correct_answer") or "").strip().upper()[:1]
+    if answer not in OPTION_KEYS:
+        return None
+    item_difficulty = str(item.get("difficulty") or difficulty or "").strip().lower()
+    if item_difficulty not in MCQ_DIFFICULTIES or (difficulty and item_difficulty != difficulty):
+        return None
+    return {
+        "question": question,
+        "difficulty": item_difficulty,
+        "options": {k: options[k] for k in OPTION_KEYS},
+        "correct_answer": answer,
+        "explanation": str(item.get("explanation") or "").strip(),
+    }
+
+
+def generate_batch(skill, difficulty, num_questions, avoid=()):
+    content = chat_completion(
+        bank_prompt(skill, difficulty, num_questions, avoid),
+        system=MCQ_SYSTEM_PROMPT,
+        model=Config.MCQ_MODEL,
+        temperature=0.8,
+        max_tokens=3000,
+    )
+    data = _clean_and_parse_json(content)
+    if isinstance(data, dict) and "questions" in data:
+        data = data["questions"]
+    if not isinstance(data, list):
+        raise ValueError(f"expected a JSON array, got {str(data)[:200]}")
+    return data
+
+
+def fill_difficulty(skill, difficulty, needed, existing_hashes, batch_size, max_rounds):
+    """Generate until `needed` new valid questions exist or max_rounds is reached."""
+    kept = []
+    seen = set(existing_hashes)
+    stats = {"generated": 0, "invalid": 0, "duplicate": 0, "failed_calls": 0}
+    for _ in range(max_rounds):
+        if len(kept) >= needed:
+            break
+        try:
+            batch = generate_batch(skill, difficulty, min(batch_size, needed - len(kept)),
+                                   avoid=[q["question"] for q in kept])
+        except Exception as e:
+            stats["failed_calls"] += 1
+            print(f"  {skill} / {difficulty}: generation failed: {e}")
+            continue
+        for item in batch:
+            stats["generated"] += 1
+            question = validate_question(item, difficulty)
+            if question is None:
+                stats["invalid"] += 1
+                continue
+            h = question_hash(question["question"])
+            if h in seen:
+                stats["duplicate"] += 1
+                continue
+            seen.add(h)
+            kept.append(question)
+    return kept[:needed], stats
+
+
+def bank_counts(skill_keys):
+    # {(skill_key, difficulty): count} for the skills being built
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT skill_key, difficulty, count(*) FROM mcq_bank WHERE skill_key = ANY(%s) GROUP BY skill_key, difficulty",
+            (list(skill_keys),),
+        )
+        rows = cursor.fetchall()
+        conn.commit()
+        cursor.close()
+    return {(k, d): n for k, d, n in rows}
+
+
+def bank_hashes(skill_key, difficulty):
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT question_hash FROM mcq_bank WHERE skill_key = %s AND difficulty = %s",
+            (skill_key, difficulty),
+        )
+        rows = cursor.fetchall()
+        conn.commit()
+        cursor.close()
+    return {r[0] for r in rows}
+
+
+def load_bank(rows, replace_skills=(), page_size=500):
+    """
+    Bulk-inserts validated questions with execute_values; duplicates of
+    questions already in the bank are skipped. Returns the rows inserted.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if replace_skills:
+            cursor.execute("DELETE FROM mcq_bank WHERE skill_key = ANY(%s)", (list(replace_skills),))
+        values = [
+            (
+                normalize_skill(r["skill"]), r["skill"], r["difficulty"], r["question"],
+                question_hash(r["question"]), json.dumps(r["options"]), r["correct_answer"],
+                r["explanation"], r.get("model"),
+            )
+            for r in rows
+        ]
+        inserted = execute_values(
+            cursor,
+            """
+            INSERT INTO mcq_bank (
+                skill_key, skill, difficulty, question, question_hash,
+                options, correct_answer, explanation, model
+            )
+            VALUES %s
+            ON CONFLICT (skill_key, question_hash) DO NOTHING
+            RETURNING id
+            """,
+            values,
+            template="(%s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s)",
+            page_size=page_size,
+            fetch=True,
+        )
+        conn.commit()
+        cursor.close()
+    return len(inserted)
+
+
+def read_skills(args):
+    skills = []
+    if args.skills:
+        skills += args.skills.split(",")
+    if args.skills_file:
+        with open(args.skills_file) as f:
+            skills += f.read().splitlines()
+    # Keep the first spelling of each skill
+    unique = {}
+    for skill in (s.strip() for s in skills):
+        if skill:
+            unique.setdefault(normalize_skill(skill), skill)
+    return unique
+
+
+def read_bank_file(path):
+    rows, rejected = [], 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            question = validate_question(item)
+            if question is None or not str(item.get("skill") or "").strip():
+                rejected += 1
+                continue
+            rows.append(dict(question, skill=item["skill"].strip(), model=item.get("model")))
+    return rows, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate and load the MCQ bank")
+    parser.add_argument("--skills", help="comma-separated skills")
+    parser.add_argument("--skills-file", help="file with one skill per line")
+    parser.add_argument("--from-file", help="load questions from a JSONL file instead of generating")
+    parser.add_argument("--per-difficulty", type=int, default=Config.MCQ_BANK_PER_DIFFICULTY,
+                        help="questions to keep per skill and difficulty")
+    parser.add_argument("--batch-size", type=int, default=10, help="questions asked for per model call")
+    parser.add_argument("--max-rounds", type=int, default=8, help="model calls per skill and difficulty at most")
+    parser.add_argument("--concurrency", type=int, default=4, help="model calls in flight at once")
+    parser.add_argument("--replace", action="store_true", help="drop the skills' existing questions first")
+    parser.add_argument("--out", help="also write the validated questions to this JSONL file")
+    parser.add_argument("--dry-run", action="store_true", help="generate and validate, but do not touch the database")
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.from_file:
+        rows, rejected = read_bank_file(args.from_file)
+        print(f"{len(rows)} valid questions in {args.from_file}, {rejected} rejected")
+        replace = {normalize_skill(r["skill"]) for r in rows} if args.replace else ()
+        if not args.dry_run:
+            print(f"Inserted {load_bank(rows, replace)} questions")
+        return
+
+    skills = read_skills(args)
+    if not skills:
+        parser.error("no skills given; use --skills or --skills-file")
+
+    counts = {} if args.replace or args.dry_run else bank_counts(skills)
+    jobs = []
+    for skill_key, skill in skills.items():
+        for difficulty in MCQ_DIFFICULTIES:
+            needed = args.per_difficulty - counts.get((skill_key, difficulty), 0)
+            if needed > 0:
+                jobs.append((skill_key, skill, difficulty, needed))
+    print(f"{len(skills)} skills, {len(jobs)} skill/difficulty pairs to fill")
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = {}
+        for skill_key, skill, difficulty, needed in jobs:
+            existing = set() if args.replace or args.dry_run else bank_hashes(skill_key, difficulty)
+            future = pool.submit(fill_difficulty, skill, difficulty, needed, existing, args.batch_size, args.max_rounds)
+            futures[future] = (skill, difficulty, needed)
+        for future in as_completed(futures):
+            skill, difficulty, needed = futures[future]
+            kept, stats = future.result()
+            rows += [dict(q, skill=skill, model=Config.MCQ_MODEL) for q in kept]
+            short = f" (SHORT by {needed - len(kept)})" if len(kept) < needed else ""
+            print(f"  {skill} / {difficulty}: kept {len(kept)}/{needed}{short} {stats}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        print(f"Wrote {len(rows)} questions to {args.out}")
+
+    if not args.dry_run:
+        replace = set(skills) if args.replace else ()
+        print(f"Inserted {load_bank(rows, replace)} questions")
+    print(f"Done in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
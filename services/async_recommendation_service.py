@@ -0,0 +1,238 @@
+import asyncio
+
+from async_db import execute, fetchrow
+from config import Config
+from database import embed_query
+from json_stream import JsonArrayItemStream
+from llm import async_chat_completion, async_stream_chat_completion
+
+from services.async_user_service import get_profile
+from recommender import catalog_candidates
+from services.recommendation_service import (
+    ROADMAP_PROMPT_VERSION, _clean_and_parse_json, _normalize_goal, _questions_prompt, _skill_cache,
+    apply_rerank, catalog_courses, profile_query, recommendation_mode, recommendation_prompt, rerank_prompt,
+    roadmap_prompt, skill_prompt, topics_prompt,
+)
+
+# asyncio versions of services/recommendation_service.py for the ASGI app.
+# Prompts, JSON repair and the skill cache are shared with the sync module;
+# only the I/O differs. Blocking work (embedding a query) runs in a thread.
+
+def _mock_response():
+    print("OPENAI_API_KEY not set - returning mock response")
+    return {
+        "error": "OPENAI_API_KEY not set",
+        "mock": True
+    }
+
+async def _complete_json(prompt):
+    if not Config.OPENAI_API_KEY:
+        return _mock_response()
+    try:
+        content = await async_chat_completion(prompt)
+        return _clean_and_parse_json(content)
+    except Exception as e:
+        print("OpenAI request failed:", e)
+        return {"error": str(e)}
+
+async def get_catalog_recommendation(profile, rerank):
+    limit = Config.USER_RECOMMENDATION_RESULTS
+    top_k = Config.USER_RECOMMENDATION_CANDIDATES if rerank else limit
+    candidates = await asyncio.to_thread(catalog_candidates, profile_query(profile), top_k)
+    if not rerank or not candidates or not Config.OPENAI_API_KEY:
+        return {"courses": catalog_courses(profile, candidates[:limit]), "mode": "catalog"}
+
+    try:
+        content = await async_chat_completion(rerank_prompt(profile, candidates, limit), max_tokens=600)
+        data = _clean_and_parse_json(content)
+    except Exception as e:
+        print("OpenAI re-rank failed:", e)
+        data = None
+    return {"courses": apply_rerank(profile, candidates, data, limit), "mode": "hybrid"}
+
+async def get_recommendation(user_id, mode=None):
+    mode = recommendation_mode(mode)
+    profile = await get_profile(user_id)
+    if mode != "llm":
+        if profile is None:
+            return None
+        return await get_catalog_recommendation(profile, rerank=mode == "hybrid")
+    return await _complete_json(recommendation_prompt(profile))
+
+async def get_topics_based_on_user(user_id):
+    profile = await get_profile(user_id)
+    return await _complete_json(topics_prompt(profile))
+
+async def get_all_questions(topic_list, fanout=False):
+    if fanout and Config.OPENAI_API_KEY:
+        questions, failed = await get_all_questions_fanout(topic_list)
+        if failed and not questions:
+            return {"error": "question generation failed for every topic", "failed_topics": failed}
+        return questions
+    return await _complete_json(_questions_prompt(topic_list))
+
+async def _questions_for_topic(topic):
+    data = _clean_and_parse_json(await async_chat_completion(_questions_prompt([topic])))
+    if isinstance(data, dict) and "error" not in data:
+        questions = data.get(topic)
+        # The model sometimes re-cases or rewords the single key
+        if questions is None and len(data) == 1:
+            questions = next(iter(data.values()))
+        if isinstance(questions, list):
+            return questions
+    raise ValueError(f"unusable model output for topic {topic!r}: {str(data)[:200]}")
+
+async def get_all_questions_fanout(topic_list, max_workers=None, retries=None):
+    """
+    Same contract as the sync get_all_questions_fanout, with a semaphore
+    instead of a thread pool bounding the requests in flight.
+    """
+    semaphore = asyncio.Semaphore(max_workers or Config.QUESTION_FANOUT_CONCURRENCY)
+    retries = Config.QUESTION_FANOUT_RETRIES if retries is None else retries
+    topics = list(dict.fromkeys(topic_list))
+    results = {}
+    remaining = topics
+
+    async def one(topic):
+        async with semaphore:
+            return await _questions_for_topic(topic)
+
+    for attempt in range(retries + 1):
+        if not remaining:
+            break
+        outcomes = await asyncio.gather(*(one(topic) for topic in remaining), return_exceptions=True)
+        failed = []
+        for topic, outcome in zip(remaining, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"Question generation failed for {topic!r} (attempt {attempt + 1}):", outcome)
+                failed.append(topic)
+            else:
+                results[topic] = outcome
+        remaining = failed
+
+    return {topic: results[topic] for topic in topics if topic in results}, remaining
+
+async def stream_all_questions(topic_list):
+    parser = JsonArrayItemStream()
+    async for text in async_stream_chat_completion(_questions_prompt(topic_list)):
+        for path, question in parser.feed(text):
+            yield (path[0] if path else None), question
+
+async def goal_step_map(goal_id, steps):
+    try:
+        await execute("INSERT INTO user_goal_path (goal_id, steps) VALUES ($1, $2::jsonb)", goal_id, steps)
+        return True
+    except Exception as e:
+        print("Error in goal_step_map:", e)
+        return False
+
+async def get_recommendation_based_on_skill(payload):
+    skill_level = payload["skill_level"].strip().lower()
+    topic_vector = None
+    if Config.SKILL_CACHE_ENABLED:
+        try:
+            topic_vector = await asyncio.to_thread(embed_query, payload["topic"])
+            cached = _skill_cache.get(skill_level, topic_vector)
+            if cached is not None:
+                return dict(cached, topic=payload["topic"])
+        except Exception as e:
+            print("Skill cache lookup failed:", e)
+
+    data = await _complete_json(skill_prompt(payload))
+    if topic_vector is not None and isinstance(data, dict) and "error" not in data:
+        _skill_cache.set(skill_level, topic_vector, data)
+    return data
+
+async def get_cached_roadmap(goal):
+    row = await fetchrow(
+        """
+        SELECT roadmap FROM goal_roadmap_cache
+        WHERE goal_key = $1 AND prompt_version = $2 AND model = $3
+          AND created_at > now() - make_interval(secs => $4)
+        """,
+        _normalize_goal(goal), ROADMAP_PROMPT_VERSION, Config.OPENAI_MODEL, float(Config.ROADMAP_CACHE_TTL),
+    )
+    return row["roadmap"] if row else None
+
+async def store_roadmap(goal, roadmap):
+    await execute(
+        """
+        INSERT INTO goal_roadmap_cache (goal_key, prompt_version, model, goal, roadmap)
+        VALUES ($1, $2, $3, $4, $5::jsonb)
+        ON CONFLICT (goal_key, prompt_version, model)
+        DO UPDATE SET goal = EXCLUDED.goal, roadmap = EXCLUDED.roadmap, created_at = now()
+        """,
+        _normalize_goal(goal), ROADMAP_PROMPT_VERSION, Config.OPENAI_MODEL, goal, roadmap,
+    )
+
+async def invalidate_roadmap_cache(goal=None):
+    if goal is None:
+        status = await execute("DELETE FROM goal_roadmap_cache")
+    else:
+        status = await execute("DELETE FROM goal_roadmap_cache WHERE goal_key = $1", _normalize_goal(goal))
+    # Status tag is "DELETE <rows>"
+    return int(status.split()[-1])
+
+async def get_required_step_by_user_goal(goal, use_cache=True):
+    use_cache = use_cache and Config.ROADMAP_CACHE_ENABLED
+    if use_cache:
+        try:
+            cached = await get_cached_roadmap(goal)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            print("Roadmap cache lookup failed:", e)
+
+    data = await _complete_json(roadmap_prompt(goal))
+    if use_cache and isinstance(data, dict) and "error" not in data:
+        try:
+            await store_roadmap(goal, data)
+        except Exception as e:
+            print("Roadmap cache write failed:", e)
+    return data
+
+# Background goal jobs run as tasks on the server's event loop and record
+# their state in the same goal_jobs table as the threaded implementation.
+_goal_tasks = set()
+
+async def _set_job_status(goal_id, status, error=None):
+    await execute(
+        """
+        INSERT INTO goal_jobs (goal_id, status, error)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (goal_id)
+        DO UPDATE SET status = EXCLUDED.status, error = EXCLUDED.error, updated_at = now()
+        """,
+        goal_id, status, error,
+    )
+
+async def _run_goal_job(goal_id, goal):
+    try:
+        result = await get_required_step_by_user_goal(goal)
+        if not isinstance(result, dict) or "error" in result:
+            error = result.get("error") if isinstance(result, dict) else "unexpected model output"
+            await _set_job_status(goal_id, "failed", str(error))
+            return
+        if not await goal_step_map(goal_id, result):
+            await _set_job_status(goal_id, "failed", "could not store goal steps")
+            return
+        await _set_job_status(goal_id, "done")
+    except Exception as e:
+        print("Goal job failed:", goal_id, e)
+        try:
+            await _set_job_status(goal_id, "failed", str(e))
+        except Exception as db_error:
+            print("Could not record goal job failure:", db_error)
+
+async def submit_goal_job(goal_id, goal):
+    await _set_job_status(goal_id, "pending")
+    # Keep a reference so the task is not garbage collected mid-run
+    task = asyncio.create_task(_run_goal_job(goal_id, goal))
+    _goal_tasks.add(task)
+    task.add_done_callback(_goal_tasks.discard)
+
+async def get_goal_job_status(goal_id):
+    return await fetchrow(
+        "SELECT goal_id, status, error, created_at, updated_at FROM goal_jobs WHERE goal_id = $1",
+        goal_id,
+    )
@@ -0,0 +1,147 @@
+import json
+
+from async_db import execute, fetch, fetchrow, fetchval
+from config import Config
+from json_stream import JsonArrayItemStream
+from llm import async_chat_completion, async_stream_chat_completion
+from services.user_service import (
+    MCQ_SYSTEM_PROMPT, cache_profile, cached_profile, generate_mcq_prompt, invalidate_profile, mcq_quotas, normalize_skill,
+)
+
+# asyncio versions of services/user_service.py for the ASGI app. Same
+# queries and return shapes; prompts are shared with the sync module.
+
+async def get_users():
+    rows = await fetch("SELECT * FROM users;")
+    return [
+        {
+            "userId": r["id"],
+            "name": r["name"],
+            "email": r["email"]
+        }
+        for r in rows
+    ]
+
+async def get_user_by_email(email):
+    row = await fetchrow("SELECT * FROM users WHERE email = $1;", email)
+    if row is None:
+        return None
+    return {
+        "userId": row["id"],
+        "name": row["name"],
+        "email": row["email"]
+    }
+
+async def create_user(data):
+    await execute(
+        "INSERT INTO users (name, email) VALUES ($1, $2)",
+        data["name"], data["email"],
+    )
+    return True
+
+async def create_profile(data):
+    query = """
+        INSERT INTO user_profile (
+            user_type, goal, interest_area, experience_level, background,
+            current_skills, learning_purpose, preferred_learning_style,
+            preferred_platforms, budget, time_available_per_week,
+            timeline, user_id
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+    """
+    await execute(
+        query,
+        data["user_type"],
+        data["goal"],
+        data["interest_area"],
+        data["experience_level"],
+        data["background"],
+        data["current_skills"],
+        data["learning_purpose"],
+        data["preferred_learning_style"],
+        data["preferred_platforms"],
+        data["budget"],
+        data["time_available_per_week"],
+        data["timeline"],
+        data["user_id"],
+    )
+    invalidate_profile(data["user_id"])
+    return True
+
+async def get_profile(user_id):
+    # Shares the sync layer's profile cache
+    profile = cached_profile(user_id)
+    if profile is not None:
+        return profile
+    row = await fetchrow("SELECT * FROM user_profile WHERE user_id = $1", user_id)
+    return cache_profile(user_id, row)
+
+async def create_user_goal(data):
+    goal_id = await fetchval(
+        "INSERT INTO user_goals (user_id, goal) VALUES ($1, $2) RETURNING id;",
+        data["user_id"], data["goal"],
+    )
+    print("Inserted goal ID:", goal_id)
+    return goal_id
+
+async def get_goal_steps(goal_id):
+    return await fetch("SELECT * FROM user_goal_path WHERE goal_id = $1", goal_id)
+
+async def get_user_goals(user_id):
+    return await fetch("SELECT * FROM user_goals WHERE user_id = $1", user_id)
+
+async def run_generate_mcq(topic):
+    content = await async_chat_completion(
+        generate_mcq_prompt(topic),
+        system=MCQ_SYSTEM_PROMPT,
+        model=Config.MCQ_MODEL,
+        temperature=0.7,
+        max_tokens=3000,
+    )
+    try:
+        return json.loads(content.strip())
+    except json.JSONDecodeError as e:
+        print("Error decoding JSON:", e)
+        return None
+
+async def stream_generate_mcq(topic):
+    parser = JsonArrayItemStream()
+    chunks = async_stream_chat_completion(
+        generate_mcq_prompt(topic),
+        system=MCQ_SYSTEM_PROMPT,
+        model=Config.MCQ_MODEL,
+        temperature=0.7,
+        max_tokens=3000,
+    )
+    async for text in chunks:
+        for _, question in parser.feed(text):
+            yield question
+
+async def sample_mcq_bank(skill, num_questions=None):
+    quotas = mcq_quotas(num_questions or Config.MCQ_SET_SIZE)
+    query = """
+        SELECT question, difficulty, options, correct_answer, explanation
+        FROM (
+            SELECT *, row_number() OVER (PARTITION BY difficulty ORDER BY random()) AS rn
+            FROM mcq_bank WHERE skill_key = $1
+        ) ranked
+        WHERE (difficulty = 'easy' AND rn <= $2)
+           OR (difficulty = 'medium' AND rn <= $3)
+           OR (difficulty = 'hard' AND rn <= $4)
+        ORDER BY CASE difficulty WHEN 'easy' THEN 0 WHEN 'medium' THEN 1 ELSE 2 END, rn
+    """
+    rows = await fetch(query, normalize_skill(skill), quotas["easy"], quotas["medium"], quotas["hard"])
+    if len(rows) < sum(quotas.values()):
+        return None
+    return rows
+
+async def bank_mcq_set(skill):
+    if Config.MCQ_SOURCE not in ("bank", "auto"):
+        return None
+    try:
+        return await sample_mcq_bank(skill)
+    except Exception as e:
+        if Config.MCQ_SOURCE == "bank":
+            raise
+        print("MCQ bank lookup failed, generating instead:", e)
+        return None
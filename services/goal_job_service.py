@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from db import get_db
+from psycopg2.extras import RealDictCursor
+
+from services.recommendation_service import get_required_step_by_user_goal, goal_step_map
+
+# Goal steps are generated off the request thread. Job state lives in the
+# goal_jobs table so any worker process can answer a status poll.
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.GOAL_JOB_WORKERS,
+                    thread_name_prefix="goal-job",
+                )
+    return _executor
+
+def _set_job_status(goal_id, status, error=None):
+    with get_db() as conn:
+        cursor = conn.cursor()
+
+        query = """
+            INSERT INTO goal_jobs (goal_id, status, error)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (goal_id)
+            DO UPDATE SET status = EXCLUDED.status, error = EXCLUDED.error, updated_at = now()
+        """
+        cursor.execute(query, (goal_id, status, error))
+        conn.commit()
+        cursor.close()
+
+def _run_goal_job(goal_id, goal):
+    try:
+        result = get_required_step_by_user_goal(goal)
+        if not isinstance(result, dict) or "error" in result:
+            error = result.get("error") if isinstance(result, dict) else "unexpected model output"
+            _set_job_status(goal_id, "failed", str(error))
+            return
+        if not goal_step_map(goal_id, result):
+            _set_job_status(goal_id, "failed", "could not store goal steps")
+            return
+        _set_job_status(goal_id, "done")
+    except Exception as e:
+        print("Goal job failed:", goal_id, e)
+        try:
+            _set_job_status(goal_id, "failed", str(e))
+        except Exception as db_error:
+            print("Could not record goal job failure:", db_error)
+
+def submit_goal_job(goal_id, goal):
+    # Record the job before queueing it so a status poll never sees a gap
+    _set_job_status(goal_id, "pending")
+    _get_executor().submit(_run_goal_job, goal_id, goal)
+
+def get_goal_job_status(goal_id):
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+        query = """
+            SELECT goal_id, status, error, created_at, updated_at FROM goal_jobs WHERE goal_id = %s
+        """
+        cursor.execute(query, (goal_id,))
+        row = cursor.fetchone()
+        conn.commit()
+        cursor.close()
+    return row
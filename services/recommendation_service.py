@@ -1,11 +1,15 @@
-import os
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cache import SemanticCache
 from config import Config
-from openai import OpenAI
+from database import embed_query
+from json_stream import JsonArrayItemStream
+from llm import chat_completion, stream_chat_completion
 
 from db import get_db
 from psycopg2.extras import RealDictCursor
+from recommender import catalog_candidates
 
 from services.user_service import get_profile
 
@@ -51,10 +55,7 @@ def _clean_and_parse_json(content):
                 "raw": content[:1000]  # Limit raw output size
             }
 
-def get_recommendation(user_id):
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    profile = get_profile(user_id)
+def recommendation_prompt(profile):
     prompt_template = """
         You are an expert course recommendation engine.
 
@@ -108,7 +109,7 @@ def get_recommendation(user_id):
         - If the budget is "0" or "low", prefer free/low-cost courses.
         """
 
-    prompt = prompt_template.format(
+    return prompt_template.format(
         user_type=profile["user_type"],
         goal=profile["goal"],
         interest_area=profile["interest_area"],
@@ -123,6 +124,135 @@ def get_recommendation(user_id):
         timeline=profile["timeline"]
     )
 
+def _profile_text(value):
+    # Array columns (interest_area, current_skills) come back as lists
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value if v)
+    return str(value or "")
+
+def profile_query(profile):
+    """Search query for the course index built from the profile fields that describe what to learn."""
+    parts = [profile.get(field) for field in ("goal", "interest_area", "current_skills", "experience_level")]
+    return ". ".join(text for text in map(_profile_text, parts) if text)
+
+def _catalog_course(hit, why):
+    rating = hit.get("Course Rating")
+    return {
+        "course_name": hit["Course Name"],
+        "platform": Config.CATALOG_PLATFORM,
+        "university": hit.get("University", ""),
+        "difficulty": hit.get("Difficulty Level", ""),
+        "url": hit.get("Course URL", ""),
+        "rating": "" if rating in (None, "") else str(rating),
+        "why_recommended": why,
+        "score": round(hit["score"], 4),
+    }
+
+def _profile_terms(profile):
+    terms = []
+    for field in ("interest_area", "current_skills"):
+        value = profile.get(field)
+        items = value if isinstance(value, (list, tuple)) else str(value or "").split(",")
+        terms += [str(t).strip() for t in items if str(t).strip()]
+    return list(dict.fromkeys(terms))
+
+def _catalog_reason(profile, hit):
+    # Deterministic justification for catalog mode: the profile interests
+    # and skills the course covers, else the goal it was retrieved for
+    text = f"{hit['Course Name']} {hit.get('Skills', '')}".lower()
+    matched = [t for t in _profile_terms(profile) if re.search(r"\b" + re.escape(t.lower()) + r"\b", text)]
+    if matched:
+        return "Covers " + ", ".join(matched[:4]) + " from your profile."
+    return f"Close match in our catalog for your goal: {_profile_text(profile.get('goal'))}."
+
+def rerank_prompt(profile, candidates, limit):
+    lines = []
+    for i, hit in enumerate(candidates, 1):
+        lines.append(
+            f"{i}. {hit['Course Name']} | {hit.get('University', '')} | {hit.get('Difficulty Level', '')}"
+            f" | rating {hit.get('Course Rating', '')} | skills: {str(hit.get('Skills', ''))[:150]}"
+        )
+    return f"""
+        You are an expert course recommendation engine.
+
+        User Profile:
+        - Goal: {_profile_text(profile.get("goal"))}
+        - Interest Area: {_profile_text(profile.get("interest_area"))}
+        - Experience Level: {_profile_text(profile.get("experience_level"))}
+        - Current Skills: {_profile_text(profile.get("current_skills"))}
+        - Learning Purpose: {_profile_text(profile.get("learning_purpose"))}
+        - Timeline: {_profile_text(profile.get("timeline"))}
+
+        Candidate courses from our catalog (id. name | university | level | rating | skills):
+{chr(10).join(lines)}
+
+        TASK: choose the best {limit} or fewer candidates for this user, best first,
+        and give a one-sentence reason for each. Use ONLY ids from the list.
+
+        OUTPUT FORMAT (JSON):
+        {{"courses": [{{"id": 1, "why_recommended": ""}}]}}
+        """
+
+def apply_rerank(profile, candidates, data, limit):
+    """
+    Maps the model's {"courses": [{"id", "why_recommended"}]} back onto the
+    candidates. Unknown or repeated ids are dropped, so every course returned
+    exists in the catalog; unusable output falls back to retrieval order.
+    """
+    picked = []
+    seen = set()
+    for item in (data.get("courses") if isinstance(data, dict) else None) or []:
+        try:
+            i = int(item.get("id")) - 1
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if 0 <= i < len(candidates) and i not in seen:
+            seen.add(i)
+            why = str(item.get("why_recommended") or "").strip() or _catalog_reason(profile, candidates[i])
+            picked.append(_catalog_course(candidates[i], why))
+        if len(picked) >= limit:
+            break
+    if not picked:
+        print("Re-rank output unusable, returning retrieval order")
+        return catalog_courses(profile, candidates[:limit])
+    return picked
+
+def catalog_courses(profile, candidates):
+    return [_catalog_course(hit, _catalog_reason(profile, hit)) for hit in candidates]
+
+def recommendation_mode(mode=None):
+    mode = (mode or Config.USER_RECOMMENDATION_MODE).lower()
+    if mode not in ("llm", "catalog", "hybrid"):
+        raise ValueError(f"unknown recommendation mode {mode!r} (expected 'llm', 'catalog' or 'hybrid')")
+    return mode
+
+def get_catalog_recommendation(profile, rerank):
+    limit = Config.USER_RECOMMENDATION_RESULTS
+    candidates = catalog_candidates(profile_query(profile), Config.USER_RECOMMENDATION_CANDIDATES if rerank else limit)
+    if not rerank or not candidates:
+        return {"courses": catalog_courses(profile, candidates[:limit]), "mode": "catalog"}
+    if not Config.OPENAI_API_KEY:
+        print("OPENAI_API_KEY not set - returning catalog order")
+        return {"courses": catalog_courses(profile, candidates[:limit]), "mode": "catalog"}
+
+    try:
+        content = chat_completion(rerank_prompt(profile, candidates, limit), max_tokens=600)
+        data = _clean_and_parse_json(content)
+    except Exception as e:
+        print("OpenAI re-rank failed:", e)
+        data = None
+    return {"courses": apply_rerank(profile, candidates, data, limit), "mode": "hybrid"}
+
+def get_recommendation(user_id, mode=None):
+    mode = recommendation_mode(mode)
+    profile = get_profile(user_id)
+    if mode != "llm":
+        if profile is None:
+            return None
+        return get_catalog_recommendation(profile, rerank=mode == "hybrid")
+
+    prompt = recommendation_prompt(profile)
+
 
     # Use OpenAI to get recommendations. Requires OPENAI_API_KEY in env.
     api_key = Config.OPENAI_API_KEY
@@ -133,33 +263,8 @@ def get_recommendation(user_id):
             "mock": True
         }
 
-    client = OpenAI(api_key=api_key)
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an assistant that returns only valid JSON in the format described to the user."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1200
-        )
-
-
-        # The new OpenAI client returns an object with attributes, not a subscriptable dict.
-        # Try attribute access first, then fall back to dict conversion.
-        content = None
-        try:
-            content = resp.choices[0].message.content
-        except Exception:
-            try:
-                resp_dict = resp.to_dict()
-                content = resp_dict["choices"][0]["message"]["content"]
-            except Exception:
-                # Fallback: stringify the whole response for debugging
-                content = str(resp)
+        content = chat_completion(prompt)
 
         # Use helper to clean and parse JSON
         data = _clean_and_parse_json(content)
@@ -168,15 +273,8 @@ def get_recommendation(user_id):
     except Exception as e:
         print("OpenAI request failed:", e)
         return {"error": str(e)}
-    finally:
-        cursor.close()
-        conn.close()
 
-def get_topics_based_on_user(user_id):    
-
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    profile = get_profile(user_id)
+def topics_prompt(profile):
     prompt_template = """You are an AI learning assistant. 
         Analyze the following user profile and identify the most relevant topics for quiz questions. 
 
@@ -203,7 +301,7 @@ def get_topics_based_on_user(user_id):
         4. Example format:
         ["Topic 1", "Topic 2", "Topic 3"]"""
     
-    prompt = prompt_template.format(
+    return prompt_template.format(
         user_type=profile["user_type"],
         goal=profile["goal"],
         interest_area=profile["interest_area"],
@@ -218,6 +316,11 @@ def get_topics_based_on_user(user_id):
         timeline=profile["timeline"]
     )
 
+def get_topics_based_on_user(user_id):    
+
+    profile = get_profile(user_id)
+    prompt = topics_prompt(profile)
+
     print(prompt)
 
     # Use OpenAI to get recommendations. Requires OPENAI_API_KEY in env.
@@ -229,33 +332,8 @@ def get_topics_based_on_user(user_id):
             "mock": True
         }
 
-    client = OpenAI(api_key=api_key)
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an assistant that returns only valid JSON in the format described to the user."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1200
-        )
-
-
-        # The new OpenAI client returns an object with attributes, not a subscriptable dict.
-        # Try attribute access first, then fall back to dict conversion.
-        content = None
-        try:
-            content = resp.choices[0].message.content
-        except Exception:
-            try:
-                resp_dict = resp.to_dict()
-                content = resp_dict["choices"][0]["message"]["content"]
-            except Exception:
-                # Fallback: stringify the whole response for debugging
-                content = str(resp)
+        content = chat_completion(prompt)
 
         # Use helper to clean and parse JSON
         data = _clean_and_parse_json(content)
@@ -264,11 +342,8 @@ def get_topics_based_on_user(user_id):
     except Exception as e:
         print("OpenAI request failed:", e)
         return {"error": str(e)}
-    finally:
-        cursor.close()
-        conn.close()
         
-def get_all_questions(topic_list):
+def _questions_prompt(topic_list):
     prompt_template = """You are an AI learning assistant. 
         Generate quiz questions for the following topics: {topics}
 
@@ -292,10 +367,13 @@ def get_all_questions(topic_list):
             "Topic 2": [ ... ]
         }}"""
     
-    prompt = prompt_template.format(
+    return prompt_template.format(
         topics=", ".join(topic_list)
     )
 
+def get_all_questions(topic_list, fanout=False):
+    prompt = _questions_prompt(topic_list)
+
     print(prompt)
 
     # Use OpenAI to get recommendations. Requires OPENAI_API_KEY in env.
@@ -307,34 +385,14 @@ def get_all_questions(topic_list):
             "mock": True
         }
 
-    client = OpenAI(api_key=api_key)
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    if fanout:
+        questions, failed = get_all_questions_fanout(topic_list)
+        if failed and not questions:
+            return {"error": "question generation failed for every topic", "failed_topics": failed}
+        return questions
 
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an assistant that returns only valid JSON in the format described to the user."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1200
-        )
-
-
-        # The new OpenAI client returns an object with attributes, not a subscriptable dict.
-        # Try attribute access first, then fall back to dict conversion.
-        content = None
-        try:
-            content = resp.choices[0].message.content
-            # print("Content received:", content)
-        except Exception:
-            try:
-                resp_dict = resp.to_dict()
-                content = resp_dict["choices"][0]["message"]["content"]
-            except Exception:
-                # Fallback: stringify the whole response for debugging
-                content = str(resp)
+        content = chat_completion(prompt)
 
         # Use helper to clean and parse JSON
         data = _clean_and_parse_json(content)
@@ -345,32 +403,89 @@ def get_all_questions(topic_list):
         print("OpenAI request failed:", e)
         return {"error": str(e)}
 
+def _questions_for_topic(topic):
+    data = _clean_and_parse_json(chat_completion(_questions_prompt([topic])))
+    if isinstance(data, dict) and "error" not in data:
+        questions = data.get(topic)
+        # The model sometimes re-cases or rewords the single key
+        if questions is None and len(data) == 1:
+            questions = next(iter(data.values()))
+        if isinstance(questions, list):
+            return questions
+    raise ValueError(f"unusable model output for topic {topic!r}: {str(data)[:200]}")
+
+def get_all_questions_fanout(topic_list, max_workers=None, retries=None):
+    """
+    Fan-out variant of get_all_questions: one request per topic, run
+    concurrently, so latency follows the slowest topic and no single
+    completion has to fit every topic under max_tokens. Topics that fail are
+    retried on their own; the others are kept.
+    Returns ({topic: [questions]}, [topics that still failed]).
+    """
+    max_workers = max_workers or Config.QUESTION_FANOUT_CONCURRENCY
+    retries = Config.QUESTION_FANOUT_RETRIES if retries is None else retries
+    topics = list(dict.fromkeys(topic_list))
+    results = {}
+    remaining = topics
+    if not topics:
+        return results, []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(topics))) as pool:
+        for attempt in range(retries + 1):
+            futures = {pool.submit(_questions_for_topic, topic): topic for topic in remaining}
+            remaining = []
+            for future in as_completed(futures):
+                topic = futures[future]
+                try:
+                    results[topic] = future.result()
+                except Exception as e:
+                    print(f"Question generation failed for {topic!r} (attempt {attempt + 1}):", e)
+                    remaining.append(topic)
+            if not remaining:
+                break
+
+    return {topic: results[topic] for topic in topics if topic in results}, remaining
+
+def stream_all_questions(topic_list):
+    """
+    Streaming variant of get_all_questions. Yields (topic, question) pairs
+    as soon as each question object is complete in the model output.
+    """
+    parser = JsonArrayItemStream()
+    for text in stream_chat_completion(_questions_prompt(topic_list)):
+        for path, question in parser.feed(text):
+            yield (path[0] if path else None), question
+
 def goal_step_map(goal_id,steps):
     try:
         print("goal_step_map",goal_id,steps)
-        conn = get_db()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        with get_db() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-        query = """
-            INSERT INTO user_goal_path (goal_id, steps)
-            VALUES (%s, %s::jsonb)
-        """
+            query = """
+                INSERT INTO user_goal_path (goal_id, steps)
+                VALUES (%s, %s::jsonb)
+            """
 
-        cursor.execute(query, (goal_id, json.dumps(steps)))
-        conn.commit()
+            cursor.execute(query, (goal_id, json.dumps(steps)))
+            conn.commit()
 
-        cursor.close()
-        conn.close()
+            cursor.close()
 
         return True
     except Exception as e:
+        # get_db() has already rolled back and returned the connection
         print("Error in goal_step_map:", e)
-        conn.rollback()
         return False
 
-def get_recommendation_based_on_skill(payload):
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+# Answers for topics that differ only in wording ("Python", "python
+# programming") are reused when their embeddings are close enough
+_skill_cache = SemanticCache(Config.SKILL_CACHE_THRESHOLD, Config.SKILL_CACHE_SIZE, Config.SKILL_CACHE_TTL)
+
+def skill_cache_stats():
+    return _skill_cache.stats()
+
+def skill_prompt(payload):
     prompt_template = """
         You are an expert online course recommendation engine.
 
@@ -427,7 +542,21 @@ def get_recommendation_based_on_skill(payload):
     # Use replace instead of format because prompt_template contains many
     # JSON braces that would be interpreted as format placeholders by
     # str.format(). Replace only the intended tokens.
-    prompt = prompt_template.replace("{topic}", payload["topic"]).replace("{skill_level}", payload["skill_level"])
+    return prompt_template.replace("{topic}", payload["topic"]).replace("{skill_level}", payload["skill_level"])
+
+def get_recommendation_based_on_skill(payload):
+    skill_level = payload["skill_level"].strip().lower()
+    topic_vector = None
+    if Config.SKILL_CACHE_ENABLED:
+        try:
+            topic_vector = embed_query(payload["topic"])
+            cached = _skill_cache.get(skill_level, topic_vector)
+            if cached is not None:
+                return dict(cached, topic=payload["topic"])
+        except Exception as e:
+            print("Skill cache lookup failed:", e)
+
+    prompt = skill_prompt(payload)
 
 
     # Use OpenAI to get recommendations. Requires OPENAI_API_KEY in env.
@@ -439,46 +568,74 @@ def get_recommendation_based_on_skill(payload):
             "mock": True
         }
 
-    client = OpenAI(api_key=api_key)
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an assistant that returns only valid JSON in the format described to the user."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1200
-        )
-
-
-        # The new OpenAI client returns an object with attributes, not a subscriptable dict.
-        # Try attribute access first, then fall back to dict conversion.
-        content = None
-        try:
-            content = resp.choices[0].message.content
-        except Exception:
-            try:
-                resp_dict = resp.to_dict()
-                content = resp_dict["choices"][0]["message"]["content"]
-            except Exception:
-                # Fallback: stringify the whole response for debugging
-                content = str(resp)
+        content = chat_completion(prompt)
 
         # Use helper to clean and parse JSON
         data = _clean_and_parse_json(content)
-        return data
 
     except Exception as e:
         print("OpenAI request failed:", e)
         return {"error": str(e)}
-    finally:
-        cursor.close()
-        conn.close()
+
+    if topic_vector is not None and isinstance(data, dict) and "error" not in data:
+        _skill_cache.set(skill_level, topic_vector, data)
+    return data
     
-def get_required_step_by_user_goal(goal):
+# Bump whenever the roadmap prompt below changes so cached roadmaps built
+# from the old prompt are no longer served
+ROADMAP_PROMPT_VERSION = "1"
+
+def _normalize_goal(goal):
+    return " ".join(goal.lower().split()).strip(" .!?")
+
+def get_cached_roadmap(goal):
+    with get_db() as conn:
+        cursor = conn.cursor()
+
+        query = """
+            SELECT roadmap FROM goal_roadmap_cache
+            WHERE goal_key = %s AND prompt_version = %s AND model = %s
+              AND created_at > now() - make_interval(secs => %s)
+        """
+        cursor.execute(query, (
+            _normalize_goal(goal), ROADMAP_PROMPT_VERSION, Config.OPENAI_MODEL, Config.ROADMAP_CACHE_TTL,
+        ))
+        row = cursor.fetchone()
+        conn.commit()
+        cursor.close()
+    return row[0] if row else None
+
+def store_roadmap(goal, roadmap):
+    with get_db() as conn:
+        cursor = conn.cursor()
+
+        query = """
+            INSERT INTO goal_roadmap_cache (goal_key, prompt_version, model, goal, roadmap)
+            VALUES (%s, %s, %s, %s, %s::jsonb)
+            ON CONFLICT (goal_key, prompt_version, model)
+            DO UPDATE SET goal = EXCLUDED.goal, roadmap = EXCLUDED.roadmap, created_at = now()
+        """
+        cursor.execute(query, (
+            _normalize_goal(goal), ROADMAP_PROMPT_VERSION, Config.OPENAI_MODEL, goal, json.dumps(roadmap),
+        ))
+        conn.commit()
+        cursor.close()
+
+def invalidate_roadmap_cache(goal=None):
+    # Drop the cached roadmap for one goal, or every cached roadmap
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if goal is None:
+            cursor.execute("DELETE FROM goal_roadmap_cache")
+        else:
+            cursor.execute("DELETE FROM goal_roadmap_cache WHERE goal_key = %s", (_normalize_goal(goal),))
+        deleted = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    return deleted
+
+def roadmap_prompt(goal):
     prompt_template = """You are an expert career advisor and learning path architect.
 
 Your task is to generate a structured, beginner-friendly but career-oriented learning path based ONLY on a user's goal.
@@ -554,7 +711,20 @@ Do NOT include markdown.
 Do NOT add explanations outside the JSON.
 """
 
-    prompt = prompt_template.replace("<INSERT GOAL>", goal)
+    return prompt_template.replace("<INSERT GOAL>", goal)
+
+def get_required_step_by_user_goal(goal, use_cache=True):
+    use_cache = use_cache and Config.ROADMAP_CACHE_ENABLED
+    if use_cache:
+        try:
+            cached = get_cached_roadmap(goal)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            # A cache outage should cost latency, not the request
+            print("Roadmap cache lookup failed:", e)
+
+    prompt = roadmap_prompt(goal)
 
     # Use OpenAI to get recommendations. Requires OPENAI_API_KEY in env.
     api_key = Config.OPENAI_API_KEY
@@ -565,38 +735,19 @@ Do NOT add explanations outside the JSON.
             "mock": True
         }
 
-    client = OpenAI(api_key=api_key)
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are an assistant that returns only valid JSON in the format described to the user."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1200
-        )
-
-
-        # The new OpenAI client returns an object with attributes, not a subscriptable dict.
-        # Try attribute access first, then fall back to dict conversion.
-        content = None
-        try:
-            content = resp.choices[0].message.content
-        except Exception:
-            try:
-                resp_dict = resp.to_dict()
-                content = resp_dict["choices"][0]["message"]["content"]
-            except Exception:
-                # Fallback: stringify the whole response for debugging
-                content = str(resp)
+        content = chat_completion(prompt)
 
         # Use helper to clean and parse JSON
         data = _clean_and_parse_json(content)
-        return data
 
     except Exception as e:
         print("OpenAI request failed:", e)
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+    if use_cache and isinstance(data, dict) and "error" not in data:
+        try:
+            store_roadmap(goal, data)
+        except Exception as e:
+            print("Roadmap cache write failed:", e)
+    return data
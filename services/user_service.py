@@ -1,20 +1,21 @@
-import os
+import copy
 import json as pyjson
 from flask import json
+from cache import TTLCache
 from config import Config
-from openai import OpenAI
 from db import get_db
+from json_stream import JsonArrayItemStream
+from llm import chat_completion, stream_chat_completion
 from psycopg2.extras import RealDictCursor
 
 def get_users():
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    cursor.execute("SELECT * FROM users;")
-    rows = cursor.fetchall()
+        cursor.execute("SELECT * FROM users;")
+        rows = cursor.fetchall()
 
-    cursor.close()
-    conn.close()
+        cursor.close()
     return [
         {
             "userId": r["id"],
@@ -25,14 +26,13 @@ def get_users():
     ]
 
 def get_user_by_email(email):
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    cursor.execute("SELECT * FROM users WHERE email = %s;",(email,))
-    row = cursor.fetchone()
+        cursor.execute("SELECT * FROM users WHERE email = %s;",(email,))
+        row = cursor.fetchone()
 
-    cursor.close()
-    conn.close()
+        cursor.close()
 
     if row is None:
         return None
@@ -42,139 +42,155 @@ def get_user_by_email(email):
         "email": row["email"]
     }
 def collect_user_data(data):
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    query = """
-        INSERT INTO user_data (userId, data)
-        VALUES (%s, %s::jsonb)
-    """
+        query = """
+            INSERT INTO user_data (userId, data)
+            VALUES (%s, %s::jsonb)
+        """
 
-    cursor.execute(query, (
-        101,          # userId
-        json.dumps(data)  # convert Python dict → JSON string
-    ))
+        cursor.execute(query, (
+            101,          # userId
+            json.dumps(data)  # convert Python dict → JSON string
+        ))
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        conn.commit()
+        cursor.close()
 
     return True
 
 def create_user(data):
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    query = """
-        INSERT INTO users (name, email)
-        VALUES (%s, %s)
-    """
+        query = """
+            INSERT INTO users (name, email)
+            VALUES (%s, %s)
+        """
 
-    cursor.execute(query, (
-        data["name"],          # userId
-        data["email"]  # convert Python dict → JSON string
-    ))
+        cursor.execute(query, (
+            data["name"],          # userId
+            data["email"]  # convert Python dict → JSON string
+        ))
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        conn.commit()
+        cursor.close()
 
     return True
 
 def create_profile(data):
     print(data)
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    query = """
-        INSERT INTO user_profile (
-            user_type, goal, interest_area, experience_level, background,
-            current_skills, learning_purpose, preferred_learning_style,
-            preferred_platforms, budget, time_available_per_week,
-            timeline, user_id
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-
-    cursor.execute(query, (
-        data["user_type"],
-        data["goal"],
-        data["interest_area"],
-        data["experience_level"],
-        data["background"],
-        data["current_skills"],
-        data["learning_purpose"],
-        data["preferred_learning_style"],
-        data["preferred_platforms"],
-        data["budget"],                     # ← you forgot this before
-        data["time_available_per_week"],
-        data["timeline"],
-        data["user_id"],
-    ))
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+        query = """
+            INSERT INTO user_profile (
+                user_type, goal, interest_area, experience_level, background,
+                current_skills, learning_purpose, preferred_learning_style,
+                preferred_platforms, budget, time_available_per_week,
+                timeline, user_id
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
 
+        cursor.execute(query, (
+            data["user_type"],
+            data["goal"],
+            data["interest_area"],
+            data["experience_level"],
+            data["background"],
+            data["current_skills"],
+            data["learning_purpose"],
+            data["preferred_learning_style"],
+            data["preferred_platforms"],
+            data["budget"],                     # ← you forgot this before
+            data["time_available_per_week"],
+            data["timeline"],
+            data["user_id"],
+        ))
+
+        conn.commit()
+        cursor.close()
+
+    invalidate_profile(data["user_id"])
     return True
 
+# Profiles are read before every profile-based LLM prompt but change rarely
+_profile_cache = TTLCache(Config.PROFILE_CACHE_SIZE, Config.PROFILE_CACHE_TTL)
+
+def invalidate_profile(user_id):
+    """Drop a cached profile; call after any write to user_profile."""
+    _profile_cache.invalidate(int(user_id))
+
+def profile_cache_stats():
+    return _profile_cache.stats()
+
+def cache_profile(user_id, row):
+    # Returns the caller's copy; the cached dict is never handed out
+    if row is None:
+        return None
+    profile = dict(row)
+    _profile_cache.set(int(user_id), profile)
+    return copy.deepcopy(profile)
+
+def cached_profile(user_id):
+    profile = _profile_cache.get(int(user_id))
+    return copy.deepcopy(profile) if profile is not None else None
+
 def get_profile(user_id):
+    profile = cached_profile(user_id)
+    if profile is not None:
+        return profile
 
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    query = """
-        SELECT * FROM user_profile WHERE user_id = %s
-    """
+        query = """
+            SELECT * FROM user_profile WHERE user_id = %s
+        """
     
-    cursor.execute(query, (
-        user_id,
-    ))
-    rows = cursor.fetchall()
-    conn.commit()
-    cursor.close()
-    conn.close()
-    print("rows", rows)
-    if(len(rows)>0):
-      return rows[0]
-    else:
-     return None
+        cursor.execute(query, (
+            user_id,
+        ))
+        row = cursor.fetchone()
+        cursor.close()
+    # Missing profiles are not cached, so a profile created later shows up at once
+    return cache_profile(user_id, row)
 
 def create_user_goal(data):
-    conn = get_db()
-    cursor = conn.cursor()
+    with get_db() as conn:
+        cursor = conn.cursor()
 
-    insert_query = """
-    INSERT INTO user_goals (user_id, goal)
-    VALUES (%s, %s)
-    RETURNING id;
-    """
-    cursor.execute(insert_query, (data["user_id"], data["goal"]))
-    goal_id = cursor.fetchone()[0]
-    print("Inserted goal ID:", goal_id)
-    conn.commit()
+        insert_query = """
+        INSERT INTO user_goals (user_id, goal)
+        VALUES (%s, %s)
+        RETURNING id;
+        """
+        cursor.execute(insert_query, (data["user_id"], data["goal"]))
+        goal_id = cursor.fetchone()[0]
+        print("Inserted goal ID:", goal_id)
+        conn.commit()
 
-    cursor.close()
-    conn.close()
+        cursor.close()
 
     return goal_id 
 
 def get_goal_steps(goal_id):
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    query = """
-        SELECT * FROM user_goal_path WHERE goal_id = %s
-    """
-    print("Executing query for goal_id:", goal_id)
-    cursor.execute(query, (
-        goal_id,
-    ))
-    rows = cursor.fetchall()
-    print("Fetched rows:", rows)
-    conn.commit()
-    cursor.close()
-    conn.close()
+        query = """
+            SELECT * FROM user_goal_path WHERE goal_id = %s
+        """
+        print("Executing query for goal_id:", goal_id)
+        cursor.execute(query, (
+            goal_id,
+        ))
+        rows = cursor.fetchall()
+        print("Fetched rows:", rows)
+        conn.commit()
+        cursor.close()
     return rows
 
 def generate_mcq_prompt(skill, num_questions=18):
@@ -227,31 +243,20 @@ def generate_mcq_prompt(skill, num_questions=18):
         RETURN ONLY VALID JSON.
         """
     return prompt
-def run_generate_mcq(topic):
-    openai_api_key = Config.OPENAI_API_KEY
-    client = OpenAI(api_key=openai_api_key)
+MCQ_SYSTEM_PROMPT = "You are a helpful assistant that generates multiple choice questions. ALWAYS return EXACTLY the number of questions requested."
 
+def run_generate_mcq(topic):
     prompt = generate_mcq_prompt(topic)
     print("prompt", prompt)
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant that generates multiple choice questions. ALWAYS return EXACTLY the number of questions requested."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
+    content = chat_completion(
+        prompt,
+        system=MCQ_SYSTEM_PROMPT,
+        model=Config.MCQ_MODEL,
         temperature=0.7,
         max_tokens=3000,
-        n=1,
-        stop=None,
     )
 
-    mcq_json_str = response.choices[0].message.content.strip()
+    mcq_json_str = content.strip()
 
     try:
         mcq_data = pyjson.loads(mcq_json_str)
@@ -260,19 +265,92 @@ def run_generate_mcq(topic):
         return None
 
     return mcq_data
-def get_user_goals(user_id):
-    conn = get_db()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    query = """
-        SELECT * FROM user_goals WHERE user_id = %s
+def stream_generate_mcq(topic):
+    """
+    Streaming variant of run_generate_mcq. Yields each question as soon as
+    the model has finished writing it.
+    """
+    parser = JsonArrayItemStream()
+    chunks = stream_chat_completion(
+        generate_mcq_prompt(topic),
+        system=MCQ_SYSTEM_PROMPT,
+        model=Config.MCQ_MODEL,
+        temperature=0.7,
+        max_tokens=3000,
+    )
+    for text in chunks:
+        for _, question in parser.feed(text):
+            yield question
+
+MCQ_DIFFICULTIES = ("easy", "medium", "hard")
+
+def normalize_skill(skill):
+    return " ".join(str(skill).lower().split())
+
+def mcq_quotas(num_questions):
+    # Same 30/40/30 split the generation prompt asks for; hard takes the rounding
+    easy = int(num_questions * 0.30)
+    medium = int(num_questions * 0.40)
+    return {"easy": easy, "medium": medium, "hard": num_questions - easy - medium}
+
+def sample_mcq_bank(skill, num_questions=None):
+    """
+    Draws a balanced easy/medium/hard set for `skill` from mcq_bank (filled
+    by run_mcq.py) in one query on the (skill_key, difficulty) index.
+    Returns None when the bank cannot fill every difficulty quota.
+    """
+    quotas = mcq_quotas(num_questions or Config.MCQ_SET_SIZE)
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+        query = """
+            SELECT question, difficulty, options, correct_answer, explanation
+            FROM (
+                SELECT *, row_number() OVER (PARTITION BY difficulty ORDER BY random()) AS rn
+                FROM mcq_bank WHERE skill_key = %s
+            ) ranked
+            WHERE (difficulty = 'easy' AND rn <= %s)
+               OR (difficulty = 'medium' AND rn <= %s)
+               OR (difficulty = 'hard' AND rn <= %s)
+            ORDER BY CASE difficulty WHEN 'easy' THEN 0 WHEN 'medium' THEN 1 ELSE 2 END, rn
+        """
+        cursor.execute(query, (normalize_skill(skill), quotas["easy"], quotas["medium"], quotas["hard"]))
+        rows = cursor.fetchall()
+        conn.commit()
+        cursor.close()
+
+    if len(rows) < sum(quotas.values()):
+        return None
+    return [dict(r) for r in rows]
+
+def bank_mcq_set(skill):
+    """
+    The bank-served question set for /generate-mcq under MCQ_SOURCE, or None
+    when the request should go to the model instead.
     """
+    if Config.MCQ_SOURCE not in ("bank", "auto"):
+        return None
+    try:
+        return sample_mcq_bank(skill)
+    except Exception as e:
+        if Config.MCQ_SOURCE == "bank":
+            raise
+        print("MCQ bank lookup failed, generating instead:", e)
+        return None
+
+def get_user_goals(user_id):
+    with get_db() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+        query = """
+            SELECT * FROM user_goals WHERE user_id = %s
+        """
     
-    cursor.execute(query, (
-        user_id,
-    ))
-    rows = cursor.fetchall()
-    conn.commit()
-    cursor.close()
-    conn.close()
+        cursor.execute(query, (
+            user_id,
+        ))
+        rows = cursor.fetchall()
+        conn.commit()
+        cursor.close()
     return rows
\ No newline at end of file
@@ -0,0 +1,249 @@
+# sharded_index.py
+#
+# A vector index split into row-range shards. generate_embeddings.py writes
+#
+#   index.shard-00.faiss, index.shard-01.faiss, ...   one index per shard
+#   index.shards.json                                 shard files and row offsets
+#
+# next to INDEX_PATH, and database.load_index() returns a ShardedIndex when
+# the manifest is there. A query is scattered to every shard at once, each
+# returns its own top-k, and the lists are merged into the global top-k.
+# Shards are searched on threads in this process (FAISS releases the GIL),
+# or with INDEX_SHARD_PROCESSES each one lives in a local worker process, so
+# the catalog is no longer limited to what one process can hold and scan.
+import json
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from catalog_filters import CatalogFilters, filtered_search
+from config import Config
+
+
+def shard_manifest_path(index_path):
+    return f"{os.path.splitext(index_path)[0]}.shards.json"
+
+
+def shard_path(index_path, i):
+    base, ext = os.path.splitext(index_path)
+    return f"{base}.shard-{i:02d}{ext or '.faiss'}"
+
+
+def shard_bounds(n, shards):
+    # Contiguous row ranges; starts are multiples of 8 so each shard's filter
+    # bitmap is a plain byte slice of the catalog bitmap
+    size = -(-n // max(shards, 1))
+    size = max(8, -(-size // 8) * 8)
+    return [(start, min(start + size, n)) for start in range(0, n, size)]
+
+
+def _search_shard(index, queries, k, bitmap=None, selected=None):
+    if bitmap is None:
+        return index.search(queries, k)
+    return filtered_search(index, queries, min(k, selected), bitmap, selected)
+
+
+def merge_results(results, offsets, k):
+    """
+    Global top-k from per-shard (scores, local ids). Ids are shifted by the
+    shard's first row; padding (-1) from short shards sorts last.
+    """
+    scores = np.hstack([s for s, _ in results])
+    ids = np.hstack([np.where(i >= 0, i + offset, -1) for (_, i), offset in zip(results, offsets)])
+    scores = np.where(ids >= 0, scores, -np.inf)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1).astype("float32"), np.take_along_axis(ids, order, axis=1)
+
+
+class LocalShard:
+    """A shard searched in this process."""
+
+    def __init__(self, index):
+        self.index = index
+        self.ntotal = index.ntotal
+        self.d = index.d
+
+    def search(self, queries, k, bitmap=None, selected=None):
+        return _search_shard(self.index, queries, k, bitmap, selected)
+
+
+def _shard_worker(path, mmap, conn):
+    from database import load_index
+    try:
+        index = load_index(path, mmap)
+    except Exception as e:
+        conn.send(("error", f"{path}: {e}"))
+        return
+    conn.send(("ready", (index.ntotal, index.d)))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            # The server process is gone
+            return
+        if message is None:
+            return
+        try:
+            conn.send(("ok", _search_shard(index, *message)))
+        except Exception as e:
+            conn.send(("error", repr(e)))
+
+
+class ProcessShard:
+    """A shard loaded and searched by a local worker process."""
+
+    def __init__(self, path, mmap):
+        import socket
+        import subprocess
+        import sys
+        from multiprocessing.connection import Connection
+
+        # A plain subprocess rather than multiprocessing, which would fork a
+        # threaded server or re-import its __main__
+        parent, child = socket.socketpair()
+        here = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "sharded_index", "--serve", os.path.abspath(path),
+             str(child.fileno()), "1" if mmap else "0"],
+            pass_fds=[child.fileno()], env=env,
+        )
+        child.close()
+        self.conn = Connection(parent.detach())
+        self._lock = threading.Lock()
+        try:
+            status, value = self.conn.recv()
+        except EOFError:
+            status, value = "error", f"exited with code {self.process.wait()}"
+        if status != "ready":
+            self.process.wait()
+            raise RuntimeError(f"Shard worker for {path} failed to start: {value}")
+        self.ntotal, self.d = value
+
+    def search(self, queries, k, bitmap=None, selected=None):
+        # One request at a time per worker; other shards run concurrently
+        with self._lock:
+            self.conn.send((np.ascontiguousarray(queries), k, bitmap, selected))
+            status, value = self.conn.recv()
+        if status != "ok":
+            raise RuntimeError(f"Shard search failed: {value}")
+        return value
+
+
+def _stop_workers(shards, pool):
+    import subprocess
+    pool.shutdown(wait=False)
+    for shard in shards:
+        if isinstance(shard, ProcessShard):
+            try:
+                shard.conn.send(None)
+            except OSError:
+                pass
+            try:
+                shard.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                shard.process.terminate()
+            shard.conn.close()
+
+
+class ShardedIndex:
+    """
+    Looks like a FAISS index to the recommender (ntotal, d, search) but
+    scatters each search over its shards and merges the results. Worker
+    processes stop when the index is garbage collected, i.e. once a hot
+    reload has swapped it out and the last search using it has finished.
+    """
+
+    def __init__(self, shards, offsets):
+        self.shards = shards
+        self.offsets = offsets
+        self.ntotal = sum(s.ntotal for s in shards)
+        self.d = shards[0].d
+        self._pool = ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="index-shard")
+        self._finalizer = weakref.finalize(self, _stop_workers, shards, self._pool)
+
+    def search(self, queries, k, bitmap=None):
+        """Top k over all shards, restricted to the rows set in `bitmap` if given."""
+        futures, offsets = [], []
+        for shard, offset in zip(self.shards, self.offsets):
+            shard_bitmap = selected = None
+            if bitmap is not None:
+                shard_bitmap = bitmap[offset // 8:(offset + shard.ntotal + 7) // 8].copy()
+                selected = CatalogFilters.count(shard_bitmap)
+                if selected == 0:
+                    continue
+            futures.append(self._pool.submit(shard.search, queries, k, shard_bitmap, selected))
+            offsets.append(offset)
+        if not futures:
+            return np.zeros((len(queries), 0), dtype="float32"), np.zeros((len(queries), 0), dtype="int64")
+        return merge_results([f.result() for f in futures], offsets, k)
+
+    def close(self):
+        self._finalizer()
+
+
+def load_sharded_index(index_path, mmap=None, processes=None):
+    from database import load_index
+    processes = Config.INDEX_SHARD_PROCESSES if processes is None else processes
+    mmap = Config.INDEX_MMAP if mmap is None else mmap
+    with open(shard_manifest_path(index_path)) as f:
+        manifest = json.load(f)
+    directory = os.path.dirname(index_path)
+    paths = [os.path.join(directory, s["file"]) for s in manifest["shards"]]
+    offsets = [s["start"] for s in manifest["shards"]]
+    if any(offset % 8 for offset in offsets):
+        raise ValueError(f"{shard_manifest_path(index_path)}: shard starts must be multiples of 8")
+    if processes:
+        # Start them all before waiting on any, so they load in parallel
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            shards = list(pool.map(lambda p: ProcessShard(p, mmap), paths))
+    else:
+        shards = [LocalShard(load_index(p, mmap)) for p in paths]
+    for shard, spec in zip(shards, manifest["shards"]):
+        if shard.ntotal != spec["rows"]:
+            raise ValueError(f"Shard {spec['file']} has {shard.ntotal} rows, the manifest says {spec['rows']}")
+    return ShardedIndex(shards, offsets)
+
+
+def write_sharded_index(embeddings, index_path, shards, index_type=None):
+    """
+    Build one index per row range of `embeddings` and write them with their
+    manifest next to `index_path`. The manifest is written last, and a stale
+    unsharded index at `index_path` is removed so loaders see the new layout.
+    """
+    import faiss
+    from database import build_faiss_index, resolve_index_type
+
+    def replace(path, write):
+        write(f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    def save_json(path, data):
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    # Every shard gets the type the whole catalog would, not one picked from
+    # its own size, so recall does not change with the shard count
+    index_type = resolve_index_type(len(embeddings), index_type)
+    specs = []
+    for i, (start, stop) in enumerate(shard_bounds(len(embeddings), shards)):
+        index = build_faiss_index(embeddings[start:stop], index_type)
+        path = shard_path(index_path, i)
+        replace(path, lambda tmp: faiss.write_index(index, tmp))
+        specs.append({"file": os.path.basename(path), "start": start, "rows": stop - start})
+    manifest = {"ntotal": len(embeddings), "d": int(embeddings.shape[1]), "index_type": index_type, "shards": specs}
+    replace(shard_manifest_path(index_path), lambda tmp: save_json(tmp, manifest))
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    return manifest
+
+
+if __name__ == "__main__":
+    # python -m sharded_index --serve <shard file> <socket fd> <mmap 0|1>,
+    # started by ProcessShard
+    import sys
+    from multiprocessing.connection import Connection
+    _, _, shard_file, fd, use_mmap = sys.argv
+    _shard_worker(shard_file, use_mmap == "1", Connection(int(fd)))
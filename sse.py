@@ -0,0 +1,16 @@
+# sse.py
+#
+# Server-sent event helpers shared by app.py (Flask) and asgi_app.py
+# (Quart). Both request objects expose .args and .headers the same way.
+import json
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def wants_stream(request):
+    # ?stream=1 or an EventSource-style Accept header
+    if request.args.get("stream", "").lower() in ("1", "true", "yes"):
+        return True
+    return "text/event-stream" in request.headers.get("Accept", "")
@@ -0,0 +1,20 @@
+import time
+
+import numpy as np
+import cache
+from cache import SemanticCache
+
+
+def test_semantic_cache_expired_entry_is_replaced(monkeypatch):
+    now = [time.monotonic()]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    semantic = SemanticCache(threshold=0.9, ttl=60)
+    vector = np.ones(8)
+    semantic.set("skills", vector, "old")
+    assert semantic.get("skills", vector) == "old"
+
+    now[0] += 61
+    assert semantic.get("skills", vector) is None
+    semantic.set("skills", vector, "new")
+    assert semantic.get("skills", vector) == "new"
+    assert semantic.stats()["size"] == {"skills": 1}